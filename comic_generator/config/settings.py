@@ -3,43 +3,88 @@
 """
 
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional, Tuple
+
+# Снимок окружения на момент импорта: один проход по os.environ
+# вместо отдельного вызова getenv на каждую настройку
+_ENV = dict(os.environ)
+
+
+def _parse_bool(value: str) -> bool:
+    """Разбор логического значения из переменной окружения."""
+    return value.strip().lower() in ("1", "true", "yes", "on")
 
 
 class Settings:
     """Класс для управления настройками приложения."""
     
+    # Схема настроек из окружения: имя -> (тип, значение по умолчанию).
+    # Разбирается один раз в _load()
+    _SCHEMA: Dict[str, Tuple[Callable[[str], Any], str]] = {
+        # Настройки LLM
+        "LLM_MODEL_NAME": (str, "llama3.1"),
+        "LLM_API_BASE": (str, "http://127.0.0.1:11434"),
+        "LLM_TEMPERATURE": (float, "0.7"),
+        "LLM_MAX_TOKENS": (int, "4000"),
+        # Настройки Stable Diffusion
+        "SD_API_BASE": (str, "http://127.0.0.1:7860"),
+        "SD_STEPS": (int, "50"),
+        "SD_WIDTH": (int, "768"),
+        "SD_HEIGHT": (int, "512"),
+        "SD_CFG_SCALE": (float, "8.0"),
+        "SD_CONCURRENCY": (int, "4"),
+        "SD_PROMPT_CACHE_ENABLED": (_parse_bool, "false"),
+        "SD_TEACACHE_ENABLED": (_parse_bool, "false"),
+        "SD_TEACACHE_REL_L1_THRESH": (float, "0.4"),
+        "SD_TEACACHE_MAX_SKIP_STEPS": (int, "3"),
+        # Настройки вывода
+        "OUTPUT_DIR": (str, "outputs"),
+        "DEFAULT_PANELS_COUNT": (int, "8"),
+        "DEFAULT_TARGET_AUDIENCE": (str, "взрослые"),
+        # Настройки логирования
+        "LOG_LEVEL": (str, "INFO"),
+    }
+    
     # Настройки LLM
-    LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "llama3.1")
-    LLM_API_BASE = os.getenv("LLM_API_BASE", "http://127.0.0.1:11434")
-    LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
-    LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "4000"))
+    LLM_MODEL_NAME: str
+    LLM_API_BASE: str
+    LLM_TEMPERATURE: float
+    LLM_MAX_TOKENS: int
     
     # Настройки Stable Diffusion
-    SD_API_BASE = os.getenv("SD_API_BASE", "http://127.0.0.1:7860")
-    SD_STEPS = int(os.getenv("SD_STEPS", "50"))
-    SD_WIDTH = int(os.getenv("SD_WIDTH", "768"))
-    SD_HEIGHT = int(os.getenv("SD_HEIGHT", "512"))
-    SD_CFG_SCALE = float(os.getenv("SD_CFG_SCALE", "8.0"))
+    SD_API_BASE: str
+    SD_STEPS: int
+    SD_WIDTH: int
+    SD_HEIGHT: int
+    SD_CFG_SCALE: float
+    SD_CONCURRENCY: int
+    SD_PROMPT_CACHE_ENABLED: bool
+    SD_TEACACHE_ENABLED: bool
+    SD_TEACACHE_REL_L1_THRESH: float
+    SD_TEACACHE_MAX_SKIP_STEPS: int
     
     # Настройки вывода
-    OUTPUT_DIR = os.getenv("OUTPUT_DIR", "outputs")
-    DEFAULT_PANELS_COUNT = int(os.getenv("DEFAULT_PANELS_COUNT", "8"))
-    DEFAULT_TARGET_AUDIENCE = os.getenv("DEFAULT_TARGET_AUDIENCE", "взрослые")
+    OUTPUT_DIR: str
+    DEFAULT_PANELS_COUNT: int
+    DEFAULT_TARGET_AUDIENCE: str
     
     # Настройки логирования
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVEL: str
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     
+    # Собранная конфигурация, заполняется в _build() при первом запросе
+    _CONFIG_TEMPLATE: Optional[Dict[str, Any]] = None
+    
     @classmethod
-    def get_config(cls) -> Dict[str, Any]:
-        """
-        Получение полной конфигурации.
-        
-        Returns:
-            Словарь с настройками
-        """
-        return {
+    def _load(cls) -> None:
+        """Разбор всех настроек из снимка окружения за один проход по схеме."""
+        for key, (cast, default) in cls._SCHEMA.items():
+            setattr(cls, key, cast(_ENV.get(key, default)))
+    
+    @classmethod
+    def _build(cls) -> Dict[str, Any]:
+        """Сборка конфигурации из разобранных настроек (один раз, при первом запросе)."""
+        cls._CONFIG_TEMPLATE = template = {
             "llm": {
                 "model_name": cls.LLM_MODEL_NAME,
                 "api_base": cls.LLM_API_BASE,
@@ -51,7 +96,12 @@ class Settings:
                 "steps": cls.SD_STEPS,
                 "width": cls.SD_WIDTH,
                 "height": cls.SD_HEIGHT,
-                "cfg_scale": cls.SD_CFG_SCALE
+                "cfg_scale": cls.SD_CFG_SCALE,
+                "concurrency": cls.SD_CONCURRENCY,
+                "prompt_cache_enabled": cls.SD_PROMPT_CACHE_ENABLED,
+                "teacache_enabled": cls.SD_TEACACHE_ENABLED,
+                "teacache_rel_l1_thresh": cls.SD_TEACACHE_REL_L1_THRESH,
+                "teacache_max_skip_steps": cls.SD_TEACACHE_MAX_SKIP_STEPS
             },
             "output_dir": cls.OUTPUT_DIR,
             "defaults": {
@@ -63,6 +113,28 @@ class Settings:
                 "format": cls.LOG_FORMAT
             }
         }
+        return template
+    
+    @classmethod
+    def get_config(cls) -> Dict[str, Any]:
+        """
+        Получение полной конфигурации.
+        
+        Атрибуты класса не меняются во время работы, поэтому конфигурация
+        собирается один раз, а вызывающему отдается копия каждого раздела:
+        значения в разделах скалярные, поэтому изменения вложенных
+        словарей не влияют на других вызывающих.
+        
+        Returns:
+            Словарь с настройками
+        """
+        template = cls._CONFIG_TEMPLATE
+        if template is None:
+            template = cls._build()
+        return {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in template.items()
+        }
     
     @classmethod
     def validate_config(cls) -> Dict[str, bool]:
@@ -102,5 +174,18 @@ class Settings:
         return results
 
 
-# Глобальная конфигурация
-DEFAULT_CONFIG = Settings.get_config()
\ No newline at end of file
+Settings._load()
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Ленивое построение глобальной конфигурации (PEP 562).
+    
+    DEFAULT_CONFIG собирается при первом обращении и кэшируется
+    в глобалах модуля, дальнейшие обращения не вызывают эту функцию.
+    """
+    if name == "DEFAULT_CONFIG":
+        value = Settings.get_config()
+        globals()["DEFAULT_CONFIG"] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -2,23 +2,41 @@
 Основной класс генератора комиксов.
 """
 
+import asyncio
 import logging
+import threading
 import time
 import os
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Set
+
+from crewai import Crew, Process
 
 from ..models.comic_models import ComicData, StyleType
 from ..services.llm_service import LLMServiceManager
 from ..services.document_service import DocumentService
 from ..generators.content_analyzer import ContentAnalyzer
 from ..generators.scenario_generator import ScenarioGenerator
-from ..generators.image_generator import ImageGenerator
+from ..generators.image_generator import ImageGenerator, PromptCache
 from ..utils.html_generator import HTMLGenerator
-from ..utils.data_manager import DataManager
+from ..utils.data_manager import DataManager, iso_timestamp
 
 logger = logging.getLogger(__name__)
 
+_BANNER = "=" * 60
+
+# Директории, уже созданные в этом процессе
+_CREATED_DIRS: Set[str] = set()
+
+
+def _ensure_dir(path: str) -> None:
+    """Создание директории, если она еще не создавалась в этом процессе."""
+    if path in _CREATED_DIRS:
+        return
+    os.makedirs(path, exist_ok=True)
+    _CREATED_DIRS.add(path)
+
 
 class ComicGenerator:
     """Главный класс генератора образовательных комиксов."""
@@ -30,7 +48,8 @@ class ComicGenerator:
         Args:
             config: Конфигурация генератора
         """
-        self.config = config or {}
+        # Копия, чтобы не изменять словарь вызывающего
+        self.config = dict(config) if config else {}
         
         # Инициализация сервисов
         self.llm_manager = LLMServiceManager(self.config.get("llm", {}))
@@ -38,10 +57,20 @@ class ComicGenerator:
         
         # Инициализация генераторов
         llm = self.llm_manager.get_llm()
-        self.content_analyzer = ContentAnalyzer(llm)
-        self.scenario_generator = ScenarioGenerator(llm)
+        # Подробный вывод агентов CrewAI только для отладки
+        verbose = bool(self.config.get("verbose", False))
+        self.content_analyzer = ContentAnalyzer(llm, verbose=verbose)
+        self.scenario_generator = ScenarioGenerator(llm, verbose=verbose)
+        sd_config = self.config.get("stable_diffusion", {})
         self.image_generator = ImageGenerator(
-            self.config.get("stable_diffusion", {}).get("api_base", "http://127.0.0.1:7860")
+            sd_config.get("api_base", "http://127.0.0.1:7860"),
+            concurrency=sd_config.get("concurrency", 4),
+            steps=sd_config.get("steps", 50),
+            # img2img по похожим промптам меняет результат, поэтому только по запросу
+            prompt_cache=PromptCache() if sd_config.get("prompt_cache_enabled", False) else None,
+            teacache_enabled=sd_config.get("teacache_enabled", False),
+            rel_l1_thresh=sd_config.get("teacache_rel_l1_thresh", 0.4),
+            max_skip_steps=sd_config.get("teacache_max_skip_steps", 3)
         )
         
         # Инициализация утилит
@@ -52,14 +81,15 @@ class ComicGenerator:
         
         # Статистика генерации
         self.generation_stats = {
-            "start_time": None,
-            "end_time": None,
             "duration_seconds": 0,
             "images_generated": 0,
             "images_failed": 0,
             "llm_calls": 0,
             "errors": []
         }
+        self._stats_view = MappingProxyType(self.generation_stats)
+        # Статистику обновляют потоки генерации изображений
+        self._stats_lock = threading.Lock()
     
     def generate_comic_from_pdf(self, 
                                pdf_path: str,
@@ -80,26 +110,38 @@ class ComicGenerator:
         Returns:
             Путь к созданному HTML файлу или None при ошибке
         """
-        self.generation_stats["start_time"] = datetime.now()
+        # Монотонный таймер: без системного времени и объектов datetime
+        self._t0 = time.perf_counter()
         
         try:
-            logger.info("="*60)
-            logger.info("🚀 ЗАПУСК ГЕНЕРАТОРА КОМИКСОВ")
-            logger.info("="*60)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(_BANNER)
+                logger.info("🚀 ЗАПУСК ГЕНЕРАТОРА КОМИКСОВ")
+                logger.info(_BANNER)
             
             # 1. Загрузка и валидация документа
             document_text = self._load_and_validate_document(pdf_path)
             if not document_text:
                 return None
             
-            # 2. Анализ содержимого
-            process_info = self._analyze_document_content(document_text)
+            # 2-4. Анализ, персонажи и сценарий одним Crew
+            process_info, characters, panels = self._run_analysis_crew(
+                document_text, target_audience, num_panels
+            )
             
-            # 3. Создание персонажей
-            characters = self._create_characters(process_info, target_audience)
+            # Поэтапно повторяются только этапы, которые Crew не осилил
+            if not process_info:
+                # 2. Анализ содержимого
+                process_info = self._analyze_document_content(document_text)
             
-            # 4. Генерация сценария
-            panels = self._create_scenario(process_info, characters, target_audience, num_panels)
+            if not characters:
+                # 3-4. Персонажи и сценарий параллельно
+                characters, panels = self._create_characters_and_scenario(
+                    process_info, target_audience, num_panels
+                )
+            elif not panels:
+                # 4. Сценарий с уже созданными персонажами
+                panels = self._create_scenario(process_info, characters, target_audience, num_panels)
             
             # 5. Генерация изображений
             image_files = self._generate_images(panels, style, output_name)
@@ -111,22 +153,20 @@ class ComicGenerator:
             self._save_project_data(process_info, characters, panels, output_name)
             
             # Завершение
-            self.generation_stats["end_time"] = datetime.now()
-            self.generation_stats["duration_seconds"] = (
-                self.generation_stats["end_time"] - self.generation_stats["start_time"]
-            ).total_seconds()
+            self.generation_stats["duration_seconds"] = time.perf_counter() - self._t0
             
-            logger.info("\\n" + "="*60)
-            logger.info("🎉 КОМИКС УСПЕШНО СОЗДАН!")
-            logger.info(f"📁 HTML файл: {html_file}")
-            logger.info(f"⏱️ Время генерации: {self.generation_stats['duration_seconds']:.1f} сек")
-            logger.info(f"🖼️ Изображений создано: {self.generation_stats['images_generated']}")
-            logger.info("="*60)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(_BANNER)
+                logger.info("🎉 КОМИКС УСПЕШНО СОЗДАН!")
+                logger.info("📁 HTML файл: %s", html_file)
+                logger.info("⏱️ Время генерации: %.1f сек", self.generation_stats['duration_seconds'])
+                logger.info("🖼️ Изображений создано: %d", self.generation_stats['images_generated'])
+                logger.info(_BANNER)
             
             return html_file
             
         except Exception as e:
-            logger.error(f"Критическая ошибка генерации комикса: {e}")
+            logger.error("Критическая ошибка генерации комикса: %s", e)
             self.generation_stats["errors"].append(str(e))
             return None
     
@@ -143,9 +183,102 @@ class ComicGenerator:
             logger.error("Документ не прошел валидацию")
             return None
         
-        logger.info(f"✅ Документ загружен, символов: {len(document_text)}")
+        logger.info("✅ Документ загружен, символов: %d", len(document_text))
         return document_text
     
+    def _run_analysis_crew(self, document_text, target_audience, num_panels):
+        """
+        Анализ документа, создание персонажей и сценария одним Crew.
+        
+        Задачи выполняются последовательно и получают результаты предыдущих
+        через context, поэтому Crew поднимается один раз вместо трех.
+        
+        Returns:
+            Кортеж (process_info, characters, panels). Этап, ответ которого
+            не удалось разобрать, и все следующие за ним равны None
+        """
+        logger.info("🔍 Анализ документа, персонажи и сценарий...")
+        
+        analysis_task = self.content_analyzer.build_task(document_text)
+        characters_task = self.scenario_generator.build_characters_task(
+            None, target_audience, context=[analysis_task]
+        )
+        scenario_task = self.scenario_generator.build_scenario_task(
+            None, None, target_audience, num_panels,
+            context=[analysis_task, characters_task]
+        )
+        
+        try:
+            crew = Crew(
+                agents=[
+                    self.content_analyzer.agent,
+                    self.scenario_generator.character_creator,
+                    self.scenario_generator.story_creator
+                ],
+                tasks=[analysis_task, characters_task, scenario_task],
+                process=Process.sequential
+            )
+            result = crew.kickoff()
+            self.generation_stats["llm_calls"] += 3
+            outputs = [str(output) for output in result.tasks_output]
+        except Exception as e:
+            logger.warning("Ошибка общего Crew, переход к поэтапной генерации: %s", e)
+            return None, None, None
+        
+        process_info = self._parse_crew_output(
+            self.content_analyzer.parse_process_info, outputs, 0
+        )
+        if not process_info:
+            logger.warning("Не удалось разобрать анализ общего Crew, переход к поэтапной генерации")
+            return None, None, None
+        
+        if not self.content_analyzer.validate_process_info(process_info):
+            logger.warning("Процесс не прошел валидацию")
+        
+        # Повторный анализ того же документа возьмет результат из кэша
+        self.content_analyzer.cache_process_info(document_text, process_info)
+        logger.info("✅ Процесс найден: %s", process_info.process_name)
+        
+        characters = self._parse_crew_output(
+            self.scenario_generator.parse_characters, outputs, 1
+        )
+        if not characters:
+            logger.warning("Не удалось разобрать персонажей общего Crew, переход к поэтапной генерации")
+            return process_info, None, None
+        logger.info("✅ Создано персонажей: %d", len(characters))
+        
+        panels = self._parse_crew_output(
+            self.scenario_generator.parse_panels, outputs, 2
+        )
+        if not panels:
+            logger.warning("Не удалось разобрать сценарий общего Crew, переход к поэтапной генерации")
+            return process_info, characters, None
+        
+        logger.info("✅ Создано панелей: %d", len(panels))
+        return process_info, characters, panels
+    
+    @staticmethod
+    def _parse_crew_output(parse, outputs, index):
+        """
+        Разбор ответа одного этапа общего Crew.
+        
+        Ошибка разбора, например список строк вместо объектов, не прерывает
+        генерацию: этап повторяется поэтапно.
+        
+        Args:
+            parse: Функция разбора ответа этапа
+            outputs: Ответы задач Crew
+            index: Номер этапа
+            
+        Returns:
+            Результат разбора или None
+        """
+        try:
+            return parse(outputs[index])
+        except Exception as e:
+            logger.warning("Ошибка разбора ответа общего Crew (этап %d): %s", index + 1, e)
+            return None
+    
     def _analyze_document_content(self, document_text: str):
         """Анализ содержимого документа."""
         logger.info("🔍 Анализ содержимого документа...")
@@ -156,7 +289,7 @@ class ComicGenerator:
         if not self.content_analyzer.validate_process_info(process_info):
             logger.warning("Процесс не прошел валидацию, используется fallback")
         
-        logger.info(f"✅ Процесс найден: {process_info.process_name}")
+        logger.info("✅ Процесс найден: %s", process_info.process_name)
         return process_info
     
     def _create_characters(self, process_info, target_audience):
@@ -166,22 +299,67 @@ class ComicGenerator:
         self.generation_stats["llm_calls"] += 1
         characters = self.scenario_generator.create_characters(process_info, target_audience)
         
-        logger.info(f"✅ Создано персонажей: {len(characters)}")
+        logger.info("✅ Создано персонажей: %d", len(characters))
         for char in characters:
-            logger.info(f"   - {char.name}: {char.role}")
+            logger.info("   - %s: %s", char.name, char.role)
         
         return characters
     
+    def _create_characters_and_scenario(self, process_info, target_audience, num_panels):
+        """
+        Параллельное создание персонажей и сценария.
+        
+        Сценарий пишется с метками ролей, имена подставляются после
+        завершения обоих запросов. Если сценарий с ролями не получен,
+        он создается заново уже с готовыми персонажами.
+        
+        Returns:
+            Кортеж (characters, panels)
+        """
+        logger.info("👥 Создание персонажей и сценария на %d панелей...", num_panels)
+        
+        try:
+            characters, panels = asyncio.run(
+                self._gather_characters_and_scenario(process_info, target_audience, num_panels)
+            )
+        except RuntimeError as e:
+            # asyncio.run нельзя вызвать из работающего event loop
+            logger.warning("Параллельная генерация недоступна, последовательный режим: %s", e)
+            characters = self._create_characters(process_info, target_audience)
+            return characters, self._create_scenario(process_info, characters, target_audience, num_panels)
+        
+        self.generation_stats["llm_calls"] += 2
+        logger.info("✅ Создано персонажей: %d", len(characters))
+        for char in characters:
+            logger.info("   - %s: %s", char.name, char.role)
+        
+        if not panels:
+            logger.warning("Сценарий с ролями не получен, последовательный режим")
+            return characters, self._create_scenario(process_info, characters, target_audience, num_panels)
+        
+        panels = self.scenario_generator.bind_characters(panels, characters)
+        logger.info("✅ Создано панелей: %d", len(panels))
+        return characters, panels
+    
+    async def _gather_characters_and_scenario(self, process_info, target_audience, num_panels):
+        """Одновременный запуск запросов персонажей и сценария."""
+        return await asyncio.gather(
+            self.scenario_generator.acreate_characters(process_info, target_audience),
+            self.scenario_generator.acreate_scenario_skeleton(
+                process_info, target_audience, num_panels
+            )
+        )
+    
     def _create_scenario(self, process_info, characters, target_audience, num_panels):
         """Создание сценария."""
-        logger.info(f"📝 Генерация сценария на {num_panels} панелей...")
+        logger.info("📝 Генерация сценария на %d панелей...", num_panels)
         
         self.generation_stats["llm_calls"] += 1
         panels = self.scenario_generator.create_scenario(
             process_info, characters, target_audience, num_panels
         )
         
-        logger.info(f"✅ Создано панелей: {len(panels)}")
+        logger.info("✅ Создано панелей: %d", len(panels))
         return panels
     
     def _generate_images(self, panels, style, output_name):
@@ -190,40 +368,82 @@ class ComicGenerator:
         
         image_files = []
         
-        if not self.image_generator.check_server():
+        if not self.image_generator.check_server(ttl=30):
             logger.warning("⚠️ Сервер Stable Diffusion недоступен, создается версия без изображений")
             return image_files
         
         # Создаем директорию для изображений
         images_dir = f"{output_name}_images"
-        os.makedirs(images_dir, exist_ok=True)
-        
-        for i, panel in enumerate(panels):
-            try:
-                logger.info(f"   Панель {i+1}/{len(panels)}: {panel.panel_id}")
-                
-                image_data = self.image_generator.generate_panel_image(panel, style)
-                
-                if image_data:
-                    filename = os.path.join(images_dir, f"panel_{i+1}.png")
-                    if self.image_generator.save_image(image_data, filename):
-                        image_files.append(filename)
+        _ensure_dir(images_dir)
+        
+        # Одна пакетная генерация вместо отдельного запроса на каждую панель
+        images = self.image_generator.generate_panels_batch(panels, style)
+        
+        prefix = images_dir + os.sep
+        save_image = self.image_generator.save_image
+        saved = {}
+        missing = []
+        for i, image_data in enumerate(images):
+            if image_data is None:
+                missing.append(i)
+                continue
+            filename = f"{prefix}panel_{i+1}.png"
+            if save_image(image_data, filename):
+                saved[i] = filename
+            else:
+                self.generation_stats["images_failed"] += 1
+        self.generation_stats["images_generated"] += len(saved)
+        
+        # Повторно генерируются только панели, которые не удалось получить пакетом
+        if missing:
+            logger.warning("Пакетом не получено изображений: %d, они генерируются по одной панели", len(missing))
+            saved.update(self._generate_images_parallel(panels, style, images_dir, missing))
+        
+        image_files = [saved[i] for i in sorted(saved)]
+        logger.info("✅ Изображений сгенерировано: %d", len(image_files))
+        return image_files
+    
+    def _generate_images_parallel(self, panels, style, images_dir, indices):
+        """Параллельная генерация изображений выбранных панелей по одной на запрос."""
+        results = {}
+        style_prefix = self.image_generator.build_style_prefix(style)
+        
+        with ThreadPoolExecutor(max_workers=min(len(indices), self.image_generator.concurrency) or 1) as executor:
+            futures = {
+                executor.submit(self._gen_one, i, panels[i], style, style_prefix, images_dir): i
+                for i in indices
+            }
+            for future in as_completed(futures):
+                filename = future.result()
+                if filename:
+                    results[futures[future]] = filename
+        
+        return results
+    
+    def _gen_one(self, i, panel, style, style_prefix, images_dir):
+        """Генерация и сохранение изображения одной панели."""
+        try:
+            logger.info("   Панель %d: %s", i+1, panel.panel_id)
+            
+            image_data = self.image_generator.generate_panel_image(panel, style, style_prefix)
+            
+            if image_data:
+                filename = f"{images_dir}{os.sep}panel_{i+1}.png"
+                if self.image_generator.save_image(image_data, filename):
+                    with self._stats_lock:
                         self.generation_stats["images_generated"] += 1
-                    else:
-                        self.generation_stats["images_failed"] += 1
-                else:
-                    self.generation_stats["images_failed"] += 1
-                
-                # Пауза между генерациями
-                time.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Ошибка генерации изображения для панели {i+1}: {e}")
+                    return filename
+            
+            with self._stats_lock:
+                self.generation_stats["images_failed"] += 1
+            
+        except Exception as e:
+            logger.error("Ошибка генерации изображения для панели %d: %s", i+1, e)
+            with self._stats_lock:
                 self.generation_stats["images_failed"] += 1
                 self.generation_stats["errors"].append(f"Image generation panel {i+1}: {e}")
         
-        logger.info(f"✅ Изображений сгенерировано: {len(image_files)}")
-        return image_files
+        return None
     
     def _create_html_output(self, panels, characters, image_files, output_name):
         """Создание HTML выходного файла."""
@@ -237,7 +457,7 @@ class ComicGenerator:
             title="Образовательный комикс"
         )
         
-        logger.info(f"✅ HTML создан: {html_file}")
+        logger.info("✅ HTML создан: %s", html_file)
         return html_file
     
     def _save_project_data(self, process_info, characters, panels, output_name):
@@ -250,7 +470,7 @@ class ComicGenerator:
             characters=characters,
             panels=panels,
             metadata={
-                "created_at": datetime.now().isoformat(),
+                "created_at": iso_timestamp(),
                 "generator_version": "1.0",
                 "config": self.config
             }
@@ -272,14 +492,23 @@ class ComicGenerator:
         
         logger.info("✅ Данные проекта сохранены")
     
-    def get_generation_stats(self) -> Dict[str, Any]:
+    def get_generation_stats(self) -> Mapping[str, Any]:
         """
         Получение статистики генерации.
         
+        Returns:
+            Представление статистики только для чтения (без копирования)
+        """
+        return self._stats_view
+    
+    def snapshot_stats(self) -> Dict[str, Any]:
+        """
+        Получение изменяемой копии статистики генерации.
+        
         Returns:
             Словарь со статистикой
         """
-        return self.generation_stats.copy()
+        return dict(self.generation_stats)
     
     def validate_dependencies(self) -> Dict[str, bool]:
         """
@@ -302,9 +531,9 @@ class ComicGenerator:
             results["stable_diffusion"] = self.image_generator.check_server()
             
             # Проверка директории
-            results["output_directory"] = os.path.exists(self.data_manager.output_dir)
+            results["output_directory"] = getattr(self.data_manager, "_output_dir_ok", False)
             
         except Exception as e:
-            logger.error(f"Ошибка валидации зависимостей: {e}")
+            logger.error("Ошибка валидации зависимостей: %s", e)
         
         return results
\ No newline at end of file
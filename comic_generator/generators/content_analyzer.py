@@ -3,56 +3,74 @@
 """
 
 from crewai import Agent, Task, Crew, Process
+import functools
+import hashlib
 import json
 import re
 import logging
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 
 from ..models.comic_models import ProcessInfo, ProcessStep, ProcessParticipant
 from ..services.llm_service import CustomOllamaLLM
+from ..utils.json_utils import loads as json_loads
 
 logger = logging.getLogger(__name__)
 
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+_JSON_DECODER = json.JSONDecoder()
 
-class ContentAnalyzer:
-    """Анализатор контента для извлечения структурированной информации из документов."""
-    
-    def __init__(self, llm: CustomOllamaLLM):
-        """
-        Инициализация анализатора.
-        
-        Args:
-            llm: Экземпляр LLM для работы с агентами
-        """
-        self.llm = llm
-        self.agent = Agent(
-            role="Специалист по анализу документов",
-            goal="Извлекать структурированную информацию из юридических документов",
-            backstory="""Ты эксперт по анализу правовых документов. Твоя задача - 
+# Сколько символов документа передается агенту на анализ
+DOCUMENT_PREFIX_LENGTH = 3000
+
+# Сколько результатов анализа хранится в кэше анализатора
+PROCESS_CACHE_SIZE = 16
+
+
+AGENT_ROLE = "Специалист по анализу документов"
+AGENT_GOAL = "Извлекать структурированную информацию из юридических документов"
+AGENT_BACKSTORY = """Ты эксперт по анализу правовых документов. Твоя задача - 
             найти ключевые процессы, этапы, участников и правила. Ты умеешь 
-            выделять главное и игнорировать второстепенные детали.""",
-            llm=llm,
-            verbose=True
-        )
+            выделять главное и игнорировать второстепенные детали."""
+
+
+@functools.lru_cache(maxsize=4)
+def _get_analysis_agent(llm: CustomOllamaLLM, verbose: bool = False) -> Agent:
+    """
+    Получение агента-аналитика, общего для всех анализаторов с одним LLM.
     
-    def extract_process_info(self, document_text: str) -> ProcessInfo:
-        """
-        Извлечение информации о процессе из документа.
+    Args:
+        llm: Экземпляр LLM для работы с агентом
+        verbose: Выводить рассуждения агента в stdout
         
-        Args:
-            document_text: Текст документа для анализа
-            
-        Returns:
-            Структурированная информация о процессе
-        """
-        logger.info("Начало анализа документа...")
+    Returns:
+        Агент CrewAI
+    """
+    return Agent(
+        role=AGENT_ROLE,
+        goal=AGENT_GOAL,
+        backstory=AGENT_BACKSTORY,
+        llm=llm,
+        verbose=verbose
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _build_task_description(text_prefix: str) -> str:
+    """
+    Построение описания задачи анализа для фрагмента документа.
+    
+    Args:
+        text_prefix: Начало документа, передаваемое агенту
         
-        task = Task(
-            description=f"""
+    Returns:
+        Текст задачи для агента
+    """
+    return f"""
 Проанализируй документ и извлеки ОСНОВНОЙ ПРОЦЕСС:
 
 ДОКУМЕНТ:
-{document_text[:3000]}
+{text_prefix}
 
 НАЙДИ И СТРУКТУРИРУЙ:
 1. НАЗВАНИЕ процесса (что именно описывается)
@@ -87,19 +105,106 @@ class ContentAnalyzer:
     "rules": ["список ключевых правил"],
     "outcome": "Что получается в результате"
 }}
-""",
-            expected_output="JSON с структурированным описанием процесса",
-            agent=self.agent
+"""
+
+
+# Процесс по умолчанию на случай ошибки анализа; строится один раз при импорте
+_FALLBACK_PROCESS = ProcessInfo(
+    process_name="Процедура рассмотрения обращений граждан",
+    participants=[
+        ProcessParticipant(
+            role="Гражданин",
+            description="Лицо, обращающееся за получением услуги"
+        ),
+        ProcessParticipant(
+            role="Специалист",
+            description="Сотрудник, обрабатывающий обращение"
+        )
+    ],
+    steps=[
+        ProcessStep(
+            step_number=1,
+            action="Подача заявления",
+            description="Гражданин подает письменное заявление с необходимыми документами",
+            responsible="Гражданин"
+        ),
+        ProcessStep(
+            step_number=2,
+            action="Прием и регистрация",
+            description="Специалист принимает и регистрирует заявление в системе",
+            responsible="Специалист"
+        ),
+        ProcessStep(
+            step_number=3,
+            action="Рассмотрение заявления",
+            description="Проверка документов и принятие решения",
+            responsible="Специалист"
+        ),
+        ProcessStep(
+            step_number=4,
+            action="Выдача результата",
+            description="Предоставление результата заявителю",
+            responsible="Специалист"
         )
+    ],
+    rules=[
+        "Заявление должно быть подано в письменной форме",
+        "Рассмотрение происходит в течение установленного срока",
+        "Необходимо предоставить полный пакет документов"
+    ],
+    outcome="Получение официального ответа или решения по обращению"
+)
+
+
+class ContentAnalyzer:
+    """Анализатор контента для извлечения структурированной информации из документов."""
+    
+    def __init__(self, llm: CustomOllamaLLM, verbose: bool = False):
+        """
+        Инициализация анализатора.
+        
+        Args:
+            llm: Экземпляр LLM для работы с агентами
+            verbose: Выводить рассуждения агента в stdout (для отладки)
+        """
+        self.llm = llm
+        self.verbose = verbose
+        # Результаты анализа по хэшу документа, вытесняются по LRU
+        self._process_cache: "OrderedDict[bytes, ProcessInfo]" = OrderedDict()
+    
+    @functools.cached_property
+    def agent(self) -> Agent:
+        """Агент создается только при первом анализе документа."""
+        return _get_analysis_agent(self.llm, self.verbose)
+    
+    def extract_process_info(self, document_text: str) -> ProcessInfo:
+        """
+        Извлечение информации о процессе из документа.
+        
+        Args:
+            document_text: Текст документа для анализа
+            
+        Returns:
+            Структурированная информация о процессе
+        """
+        logger.info("Начало анализа документа...")
+        
+        # Повторный анализ того же документа не запускает CrewAI заново
+        cached = self.get_cached_process_info(document_text)
+        if cached is not None:
+            logger.info("Используется сохраненный результат анализа документа")
+            return cached
+        
+        task = self.build_task(document_text)
         
         try:
             crew = Crew(agents=[self.agent], tasks=[task], process=Process.sequential)
             result = crew.kickoff()
             
-            # Парсим JSON из ответа
-            process_data = self._parse_json_from_response(str(result))
-            if process_data:
-                return self._create_process_info_from_data(process_data)
+            process_info = self.parse_process_info(str(result))
+            if process_info:
+                self.cache_process_info(document_text, process_info)
+                return process_info
             
         except Exception as e:
             logger.error(f"Ошибка анализа документа: {e}")
@@ -107,6 +212,80 @@ class ContentAnalyzer:
         # Возвращаем fallback процесс
         return self._get_fallback_process()
     
+    @staticmethod
+    def _document_digest(document_text: str) -> bytes:
+        """
+        Ключ кэша по полному тексту документа.
+        
+        Args:
+            document_text: Текст документа
+            
+        Returns:
+            Хэш документа
+        """
+        return hashlib.blake2b(document_text.encode("utf-8"), digest_size=16).digest()
+    
+    def get_cached_process_info(self, document_text: str) -> Optional[ProcessInfo]:
+        """
+        Получение сохраненного результата анализа документа.
+        
+        Args:
+            document_text: Текст документа
+            
+        Returns:
+            ProcessInfo или None, если документ еще не анализировался
+        """
+        digest = self._document_digest(document_text)
+        cached = self._process_cache.get(digest)
+        if cached is not None:
+            self._process_cache.move_to_end(digest)
+        return cached
+    
+    def cache_process_info(self, document_text: str, process_info: ProcessInfo) -> None:
+        """
+        Сохранение результата анализа документа.
+        
+        Args:
+            document_text: Текст документа
+            process_info: Результат анализа
+        """
+        digest = self._document_digest(document_text)
+        self._process_cache[digest] = process_info
+        self._process_cache.move_to_end(digest)
+        while len(self._process_cache) > PROCESS_CACHE_SIZE:
+            self._process_cache.popitem(last=False)
+    
+    def build_task(self, document_text: str) -> Task:
+        """
+        Создание задачи анализа документа.
+        
+        Args:
+            document_text: Текст документа для анализа
+            
+        Returns:
+            Задача CrewAI
+        """
+        return Task(
+            description=_build_task_description(document_text[:DOCUMENT_PREFIX_LENGTH]),
+            expected_output="JSON с структурированным описанием процесса",
+            agent=self.agent
+        )
+    
+    def parse_process_info(self, response: str) -> Optional[ProcessInfo]:
+        """
+        Извлечение информации о процессе из ответа агента.
+        
+        Args:
+            response: Ответ от LLM
+            
+        Returns:
+            ProcessInfo или None, если ответ не содержит JSON
+        """
+        process_data = self._parse_json_from_response(response)
+        if process_data:
+            return self._create_process_info_from_data(process_data)
+        return None
+    
     def _parse_json_from_response(self, response: str) -> Optional[Dict[str, Any]]:
         """
         Извлечение JSON из ответа LLM.
@@ -118,11 +297,20 @@ class ContentAnalyzer:
             Распарсенный JSON или None
         """
         try:
-            # Ищем JSON блок в ответе
-            json_match = re.search(r'\\{.*\\}', response, re.DOTALL)
+            # Разбираем JSON с первой открывающей скобки: декодер сам
+            # останавливается на конце объекта и не сканирует хвост ответа
+            start = response.find('{')
+            if start != -1:
+                try:
+                    data, _ = _JSON_DECODER.raw_decode(response, start)
+                    return data
+                except ValueError:
+                    pass
+            
+            # Запасной вариант: от первой до последней фигурной скобки
+            json_match = _JSON_RE.search(response)
             if json_match:
-                json_str = json_match.group()
-                return json.loads(json_str)
+                return json_loads(json_match.group())
         except Exception as e:
             logger.warning(f"Ошибка парсинга JSON из ответа: {e}")
         
@@ -138,25 +326,27 @@ class ContentAnalyzer:
         Returns:
             Объект ProcessInfo
         """
-        # Создаем участников
-        participants = []
-        for p_data in data.get("participants", []):
-            participant = ProcessParticipant(
+        # Создаем участников; строки вместо объектов модель пишет при сбое формата
+        participants = [
+            ProcessParticipant(
                 role=p_data.get("role", ""),
                 description=p_data.get("description", "")
             )
-            participants.append(participant)
+            for p_data in data.get("participants") or ()
+            if isinstance(p_data, dict)
+        ]
         
         # Создаем этапы
-        steps = []
-        for s_data in data.get("steps", []):
-            step = ProcessStep(
+        steps = [
+            ProcessStep(
                 step_number=s_data.get("step_number", 0),
                 action=s_data.get("action", ""),
                 description=s_data.get("description", ""),
                 responsible=s_data.get("responsible", "")
             )
-            steps.append(step)
+            for s_data in data.get("steps") or ()
+            if isinstance(s_data, dict)
+        ]
         
         return ProcessInfo(
             process_name=data.get("process_name", "Неизвестный процесс"),
@@ -173,55 +363,7 @@ class ContentAnalyzer:
         Returns:
             Базовый ProcessInfo
         """
-        participants = [
-            ProcessParticipant(
-                role="Гражданин",
-                description="Лицо, обращающееся за получением услуги"
-            ),
-            ProcessParticipant(
-                role="Специалист",
-                description="Сотрудник, обрабатывающий обращение"
-            )
-        ]
-        
-        steps = [
-            ProcessStep(
-                step_number=1,
-                action="Подача заявления",
-                description="Гражданин подает письменное заявление с необходимыми документами",
-                responsible="Гражданин"
-            ),
-            ProcessStep(
-                step_number=2,
-                action="Прием и регистрация",
-                description="Специалист принимает и регистрирует заявление в системе",
-                responsible="Специалист"
-            ),
-            ProcessStep(
-                step_number=3,
-                action="Рассмотрение заявления",
-                description="Проверка документов и принятие решения",
-                responsible="Специалист"
-            ),
-            ProcessStep(
-                step_number=4,
-                action="Выдача результата",
-                description="Предоставление результата заявителю",
-                responsible="Специалист"
-            )
-        ]
-        
-        return ProcessInfo(
-            process_name="Процедура рассмотрения обращений граждан",
-            participants=participants,
-            steps=steps,
-            rules=[
-                "Заявление должно быть подано в письменной форме",
-                "Рассмотрение происходит в течение установленного срока",
-                "Необходимо предоставить полный пакет документов"
-            ],
-            outcome="Получение официального ответа или решения по обращению"
-        )
+        return _FALLBACK_PROCESS
     
     def validate_process_info(self, process_info: ProcessInfo) -> bool:
         """
@@ -233,18 +375,14 @@ class ContentAnalyzer:
         Returns:
             True если информация валидна
         """
-        if not process_info.process_name or len(process_info.process_name.strip()) < 5:
-            return False
-        
-        if len(process_info.participants) < 1:
-            return False
-        
-        if len(process_info.steps) < 2:
-            return False
-        
-        # Проверяем, что у каждого этапа есть основная информация
-        for step in process_info.steps:
-            if not step.action or not step.responsible:
-                return False
+        name = process_info.process_name
+        steps = process_info.steps
         
-        return True
\ No newline at end of file
+        # Проверяем по порядку и останавливаемся на первом нарушении;
+        # у каждого этапа должны быть действие и ответственный
+        return bool(
+            name and len(name.strip()) >= 5
+            and process_info.participants
+            and len(steps) >= 2
+            and all(step.action and step.responsible for step in steps)
+        )
\ No newline at end of file
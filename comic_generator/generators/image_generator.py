@@ -3,29 +3,201 @@
 """
 
 import base64
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image
 import io
+import re
+import threading
 import time
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
 
 from ..models.comic_models import ComicPanel, StyleType
+from ..utils.json_utils import JSON_HEADERS, dumps as json_dumps, loads as json_loads
 
 logger = logging.getLogger(__name__)
 
+_TOKEN_RE = re.compile(r"\w+")
+_PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+# Ограничение длины промпта в словах: CLIP кодирует текст окнами по 75
+# токенов, и каждое следующее окно удорожает каждый шаг генерации
+MAX_PROMPT_WORDS = 60
+# Сколько слов описания сцены остается даже при длинных остальных частях
+MIN_SCENE_WORDS = 12
+# Минимум шагов денойзинга для второстепенных панелей
+MIN_PANEL_STEPS = 25
+
+
+def _first_image_from_body(body: bytes) -> bytes:
+    """
+    Извлечение первого изображения из тела ответа SD API.
+    
+    Ответ кроме изображения содержит info и копию параметров запроса
+    (для img2img вместе с исходной картинкой), поэтому base64 строка
+    вырезается из байтов напрямую, без разбора всего JSON и декодирования
+    в str. Если разметка неожиданная, используется обычный разбор JSON.
+    
+    Args:
+        body: Тело ответа txt2img/img2img
+        
+    Returns:
+        Данные изображения в байтах
+    """
+    key = body.find(b'"images"')
+    bracket = body.find(b'[', key) if key != -1 else -1
+    if bracket != -1:
+        # Первым элементом массива должна быть строка, иначе (пустой массив,
+        # другая разметка) срез захватил бы следующую строку JSON
+        start = bracket + 1
+        while body[start:start + 1] in (b' ', b'\n', b'\r', b'\t'):
+            start += 1
+        end = body.find(b'"', start + 1)
+        if body[start:start + 1] == b'"' and end != -1:
+            # Экранирование '\/' отбрасывается декодером как посторонний символ
+            return base64.b64decode(body[start + 1:end])
+    
+    return base64.b64decode(json_loads(body)['images'][0])
+
+
+class PromptCache:
+    """
+    Приближенный кэш изображений по похожести промптов.
+    
+    Похожесть считается мерой Жаккара по множествам слов промпта и только
+    среди записей с тем же негативным промптом и размером. Найденное
+    изображение используется как основа для img2img, где сервер проходит
+    только часть шагов денойзинга вместо генерации с нуля.
+    """
+    
+    def __init__(self, threshold: float = 0.9, maxsize: int = 64):
+        """
+        Инициализация кэша.
+        
+        Args:
+            threshold: Минимальная похожесть промптов для попадания в кэш
+            maxsize: Максимальное количество хранимых изображений
+        """
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, str, int, int], Tuple[FrozenSet[str], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _tokens(prompt: str) -> FrozenSet[str]:
+        """Множество слов промпта."""
+        return frozenset(_TOKEN_RE.findall(prompt.lower()))
+    
+    def lookup(self,
+               prompt: str,
+               negative_prompt: str,
+               width: int,
+               height: int) -> Optional[bytes]:
+        """
+        Поиск изображения для наиболее похожего промпта.
+        
+        Args:
+            prompt: Промпт для генерации
+            negative_prompt: Негативный промпт
+            width: Ширина изображения
+            height: Высота изображения
+            
+        Returns:
+            Данные изображения или None, если похожих промптов нет
+        """
+        tokens = self._tokens(prompt)
+        if not tokens:
+            return None
+        
+        with self._lock:
+            best_key, best_score = None, 0.0
+            for key, (entry_tokens, _) in self._entries.items():
+                if key[1:] != (negative_prompt, width, height):
+                    continue
+                score = len(tokens & entry_tokens) / len(tokens | entry_tokens)
+                if score > best_score:
+                    best_key, best_score = key, score
+            
+            if best_key is None or best_score < self.threshold:
+                return None
+            
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key][1]
+    
+    def store(self,
+              prompt: str,
+              negative_prompt: str,
+              width: int,
+              height: int,
+              image_data: bytes) -> None:
+        """
+        Сохранение сгенерированного изображения.
+        
+        Args:
+            prompt: Промпт, по которому получено изображение
+            negative_prompt: Негативный промпт
+            width: Ширина изображения
+            height: Высота изображения
+            image_data: Данные изображения
+        """
+        key = (prompt, negative_prompt, width, height)
+        with self._lock:
+            self._entries[key] = (self._tokens(prompt), image_data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
 
 class ImageGenerator:
     """Генератор изображений с оптимизированными промптами для Stable Diffusion."""
     
-    def __init__(self, api_base: str = "http://127.0.0.1:7860"):
+    def __init__(self,
+                 api_base: str = "http://127.0.0.1:7860",
+                 concurrency: int = 4,
+                 steps: int = 50,
+                 prompt_cache: Optional[PromptCache] = None,
+                 teacache_enabled: bool = False,
+                 rel_l1_thresh: float = 0.4,
+                 max_skip_steps: int = 3):
         """
         Инициализация генератора изображений.
         
         Args:
             api_base: Базовый URL для Stable Diffusion API
+            concurrency: Максимум одновременных запросов к серверу
+            steps: Количество шагов для самых важных панелей
+            prompt_cache: Кэш изображений по похожим промптам (None - отключен)
+            teacache_enabled: Включить расширение TeaCache на сервере
+            rel_l1_thresh: Порог изменения признаков для пропуска блоков TeaCache
+            max_skip_steps: Максимум подряд пропускаемых шагов TeaCache
         """
         self.api_base = api_base
+        self.concurrency = concurrency
+        self.steps = steps
+        self.prompt_cache = prompt_cache
+        
+        # Кэширование признаков между шагами денойзинга (расширение TeaCache для WebUI)
+        self.teacache_enabled = teacache_enabled
+        self.rel_l1_thresh = rel_l1_thresh
+        self.max_skip_steps = max_skip_steps
+        
+        # Общая сессия: соединения с сервером переиспользуются между запросами
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Готовые PNG заглушки по размеру (ширина, высота)
+        self._placeholder_cache: Dict[Tuple[int, int], bytes] = {}
+        
+        # Кэш последней проверки сервера
+        self._last_check_t: float = float("-inf")
+        self._last_check_ok: bool = False
+        # Сообщение о недоступности сервера уже выведено для текущей серии ошибок
+        self._server_down_reported: bool = False
         
         # Базовые стили для разных типов панелей
         self.style_presets = {
@@ -35,15 +207,33 @@ class ImageGenerator:
             StyleType.NARRATIVE.value: "storytelling illustration, sequential art, comic book style"
         }
         
-        # Оптимизированные промпты для читаемых speech bubbles
+        # Промпты для читаемых speech bubbles, без повторяющихся понятий
         self.text_quality_prompts = [
-            "clear readable text in speech bubbles",
-            "sharp text, high contrast speech bubbles",
-            "professional comic book lettering",
-            "clean white speech bubbles with black text",
-            "well-defined text areas, no blurred letters"
+            "clean white speech bubbles with sharp black text",
+            "professional comic lettering"
         ]
         
+        # Неизменные фрагменты промпта собираются один раз
+        self._prompt_tail = (
+            "high quality illustration, consistent art style, "
+            f"{', '.join(self.text_quality_prompts)}"
+        )
+        self._negative_prompt = (
+            "blurry or unreadable text, messy speech bubbles, "
+            "inconsistent characters, bad anatomy, low quality, "
+            "artifacts, watermark, dark lighting, cluttered composition"
+        )
+        self._prompt_tail_words = len(self._prompt_tail.split())
+        
+        # Описания известных персонажей для промпта
+        self._char_descriptions = {
+            "Алексей": "teenage boy with brown hair, wearing casual modern clothes, friendly expression",
+            "Мария": "teenage girl with blonde hair, wearing modern clothes, curious expression", 
+            "Специалист": "professional adult in business attire, helpful demeanor",
+            "Мария Ивановна": "middle-aged woman in business attire, professional and kind",
+            "Чиновник": "middle-aged person in formal wear, official appearance"
+        }
+        
         # Промпты для настроений
         self.mood_prompts = {
             "дружелюбный": "warm lighting, positive atmosphere, welcoming environment",
@@ -54,26 +244,77 @@ class ImageGenerator:
             "нейтральный": "neutral atmosphere, balanced lighting"
         }
     
-    def check_server(self) -> bool:
+    def check_server(self, ttl: float = 10.0) -> bool:
         """
         Проверка доступности сервера Stable Diffusion.
         
+        Результат проверки кэшируется на ttl секунд, чтобы частые
+        генерации не опрашивали сервер перед каждым запросом.
+        
+        Args:
+            ttl: Время жизни результата предыдущей проверки в секундах
+            
         Returns:
             True если сервер доступен
         """
+        now = time.monotonic()
+        if now - self._last_check_t < ttl:
+            return self._last_check_ok
+        
         try:
-            response = requests.get(f"{self.api_base}/sdapi/v1/options", timeout=5)
-            return response.status_code == 200
+            response = self.session.get(f"{self.api_base}/sdapi/v1/options", timeout=5)
+            available = response.status_code == 200
         except Exception as e:
             logger.warning(f"Сервер Stable Diffusion недоступен: {e}")
-            return False
+            available = False
+        
+        self._last_check_t = time.monotonic()
+        self._last_check_ok = available
+        if available:
+            self._server_down_reported = False
+        return available
+    
+    def _on_connection_error(self, error: Exception) -> None:
+        """
+        Обработка ошибки соединения с сервером.
+        
+        Сбрасывает кэш проверки сервера и пишет в лог один раз на серию
+        ошибок, а не на каждый из одновременных запросов.
+        
+        Args:
+            error: Исключение соединения
+        """
+        self._last_check_t = float("-inf")
+        self._last_check_ok = False
+        if self._server_down_reported:
+            logger.debug(f"Сервер Stable Diffusion недоступен: {error}")
+        else:
+            self._server_down_reported = True
+            logger.error(f"Сервер Stable Diffusion недоступен: {error}")
+    
+    def build_style_prefix(self, style: str = StyleType.EDUCATIONAL.value) -> str:
+        """
+        Создание начала промпта, зависящего только от стиля.
+        
+        Стиль одинаков для всех панелей комикса, поэтому префикс
+        достаточно построить один раз на генерацию.
+        
+        Args:
+            style: Стиль изображения
+            
+        Returns:
+            Префикс промпта
+        """
+        base_style = self.style_presets.get(style, self.style_presets[StyleType.EDUCATIONAL.value])
+        return f"{base_style}, "
     
     def build_optimized_prompt(self, 
                              scene_description: str, 
                              dialogue: str,
                              characters: List[str], 
                              mood: str, 
-                             style: str = StyleType.EDUCATIONAL.value) -> Tuple[str, str]:
+                             style: str = StyleType.EDUCATIONAL.value,
+                             style_prefix: Optional[str] = None) -> Tuple[str, str]:
         """
         Создание оптимизированного промпта для высокого качества.
         
@@ -83,24 +324,19 @@ class ImageGenerator:
             characters: Список персонажей
             mood: Настроение сцены
             style: Стиль изображения
+            style_prefix: Готовый префикс стиля из build_style_prefix
             
         Returns:
             Кортеж (промпт, negative_prompt)
         """
         # Базовый стиль
-        base_style = self.style_presets.get(style, self.style_presets[StyleType.EDUCATIONAL.value])
+        if style_prefix is None:
+            style_prefix = self.build_style_prefix(style)
         
         # Промпт для персонажей
         char_prompt = ""
         if characters:
-            char_descriptions = {
-                "Алексей": "teenage boy with brown hair, wearing casual modern clothes, friendly expression",
-                "Мария": "teenage girl with blonde hair, wearing modern clothes, curious expression", 
-                "Специалист": "professional adult in business attire, helpful demeanor",
-                "Мария Ивановна": "middle-aged woman in business attire, professional and kind",
-                "Чиновник": "middle-aged person in formal wear, official appearance"
-            }
-            char_list = [char_descriptions.get(char, f"person named {char}") for char in characters]
+            char_list = [self._char_descriptions.get(char, f"person named {char}") for char in characters]
             char_prompt = f"featuring {', '.join(char_list)}, "
         
         # Промпт для диалога (если есть)
@@ -111,31 +347,32 @@ class ImageGenerator:
         # Промпт для настроения
         mood_prompt = self.mood_prompts.get(mood, "neutral atmosphere")
         
-        # Собираем финальный промпт
-        final_prompt = f"""
-{base_style}, {char_prompt}{dialogue_prompt}
-{scene_description}, {mood_prompt},
-high quality illustration, sharp details, consistent art style,
-{', '.join(self.text_quality_prompts[:2])},
-masterpiece, professional comic art, 8k resolution
-""".strip().replace('\n', ' ')
-        
-        # Negative prompt для улучшения качества
-        negative_prompt = """
-blurry text, unreadable text, messy speech bubbles, 
-inconsistent character design, bad anatomy, low quality,
-pixelated, artifacts, watermark, signature,
-dark lighting, confusing layout, cluttered composition
-""".strip()
-        
-        return final_prompt, negative_prompt
+        # Лишние слова сцены отбрасываются, чтобы промпт не вышел за окно CLIP
+        fixed_words = (
+            len(style_prefix.split()) + len(char_prompt.split()) + len(dialogue_prompt.split())
+            + len(mood_prompt.split()) + self._prompt_tail_words
+        )
+        scene_words = scene_description.split()
+        budget = max(MAX_PROMPT_WORDS - fixed_words, MIN_SCENE_WORDS)
+        if len(scene_words) > budget:
+            scene_description = " ".join(scene_words[:budget])
+        
+        # Собираем финальный промпт из готовых фрагментов
+        final_prompt = (
+            f"{style_prefix}{char_prompt}{dialogue_prompt} "
+            f"{scene_description}, {mood_prompt}, {self._prompt_tail}"
+        ).strip().replace('\n', ' ')
+        
+        return final_prompt, self._negative_prompt
     
     def generate_with_enhanced_settings(self, 
                                       prompt: str, 
                                       negative_prompt: str,
                                       steps: int = 50, 
                                       width: int = 768, 
-                                      height: int = 512) -> Optional[bytes]:
+                                      height: int = 512,
+                                      enable_hr: bool = True,
+                                      hr_denoising: float = 0.7) -> Optional[bytes]:
         """
         Генерация изображения с улучшенными настройками.
         
@@ -145,58 +382,278 @@ dark lighting, confusing layout, cluttered composition
             steps: Количество шагов
             width: Ширина изображения
             height: Высота изображения
+            enable_hr: Включить HR-проход (upscaling)
+            hr_denoising: denoising_strength для HR-прохода
             
         Returns:
             Данные изображения в байтах или None при ошибке
         """
         try:
-            if not self.check_server():
-                logger.error("Сервер Stable Diffusion недоступен")
-                return None
+            # Отдельной проверки сервера нет: при недоступности запрос
+            # сразу падает с ошибкой соединения
+            payload = self._build_payload(
+                prompt, negative_prompt, steps, width, height, enable_hr, hr_denoising
+            )
+            endpoint = "txt2img"
             
-            payload = {
-                "prompt": prompt,
-                "negative_prompt": negative_prompt,
-                "steps": steps,
-                "width": width,
-                "height": height,
-                "cfg_scale": 8.0,  # Увеличено для лучшего следования промпту
-                "sampler_name": "DPM++ 2M Karras",  # Лучший сэмплер для качества
-                "seed": -1,
-                "restore_faces": True,  # Улучшение лиц
-                "enable_hr": True,      # Upscaling для лучшего качества
-                "hr_scale": 1.5,
-                "hr_upscaler": "R-ESRGAN 4x+",
-                "denoising_strength": 0.7
-            }
+            # Для похожего промпта дорабатываем готовое изображение через
+            # img2img: сервер проходит только denoising_strength * steps шагов
+            cached = None
+            if self.prompt_cache is not None:
+                cached = self.prompt_cache.lookup(prompt, negative_prompt, width, height)
+            if cached is not None:
+                logger.debug("Найдено изображение для похожего промпта, используется img2img")
+                for key in ("enable_hr", "hr_scale", "hr_upscaler"):
+                    payload.pop(key)
+                payload["init_images"] = [base64.b64encode(cached).decode("ascii")]
+                payload["denoising_strength"] = 0.5
+                endpoint = "img2img"
             
-            response = requests.post(
-                f"{self.api_base}/sdapi/v1/txt2img",
-                json=payload,
+            response = self.session.post(
+                f"{self.api_base}/sdapi/v1/{endpoint}",
+                data=json_dumps(payload),
+                headers=JSON_HEADERS,
                 timeout=600  # Увеличен таймаут для upscaling
             )
             
             if response.status_code == 200:
-                result = response.json()
-                image_data = result['images'][0]
-                return base64.b64decode(image_data)
+                image_data = _first_image_from_body(response.content)
+                if cached is None and self.prompt_cache is not None:
+                    self.prompt_cache.store(prompt, negative_prompt, width, height, image_data)
+                self._server_down_reported = False
+                return image_data
             else:
                 logger.error(f"Ошибка генерации: HTTP {response.status_code}")
                 return None
                 
+        except requests.ConnectionError as e:
+            self._on_connection_error(e)
+            return None
         except Exception as e:
             logger.error(f"Ошибка при генерации изображения: {e}")
             return None
     
+    def _build_payload(self,
+                       prompt: str,
+                       negative_prompt: str,
+                       steps: int = 50,
+                       width: int = 768,
+                       height: int = 512,
+                       enable_hr: bool = True,
+                       hr_denoising: float = 0.7) -> Dict[str, Any]:
+        """
+        Формирование тела запроса к txt2img.
+        
+        Args:
+            prompt: Промпт для генерации
+            negative_prompt: Негативный промпт
+            steps: Количество шагов
+            width: Ширина изображения
+            height: Высота изображения
+            enable_hr: Включить HR-проход (upscaling)
+            hr_denoising: denoising_strength для HR-прохода
+            
+        Returns:
+            Словарь с параметрами генерации
+        """
+        payload = {
+            "prompt": prompt,
+            "negative_prompt": negative_prompt,
+            "steps": steps,
+            "width": width,
+            "height": height,
+            "cfg_scale": 8.0,  # Увеличено для лучшего следования промпту
+            "sampler_name": "DPM++ 2M Karras",  # Лучший сэмплер для качества
+            "seed": -1,
+            "restore_faces": True,  # Улучшение лиц
+            "enable_hr": enable_hr,  # Upscaling для лучшего качества
+            "hr_scale": 1.5,
+            "hr_upscaler": "R-ESRGAN 4x+",
+            "denoising_strength": hr_denoising
+        }
+        
+        if self.teacache_enabled:
+            payload["alwayson_scripts"] = {
+                "teacache": {"args": [self.rel_l1_thresh, self.max_skip_steps]}
+            }
+        
+        return payload
+    
+    def fidelity_for(self, importance: float) -> Tuple[int, bool, float]:
+        """
+        Параметры качества генерации в зависимости от важности панели.
+        
+        Число шагов растет от MIN_PANEL_STEPS до настроенного self.steps,
+        поэтому ключевые панели не дороже прежнего. Второстепенные панели
+        генерируются без HR-прохода, полный HR-проход только для ключевых.
+        
+        Args:
+            importance: Важность панели от 0 до 1
+            
+        Returns:
+            Кортеж (steps, enable_hr, hr_denoising)
+        """
+        importance = min(max(importance, 0.0), 1.0)
+        floor = min(MIN_PANEL_STEPS, self.steps)
+        steps = round(floor + (self.steps - floor) * importance)
+        enable_hr = importance > 0.75
+        hr_denoising = 0.7 if importance >= 0.9 else 0.5
+        return steps, enable_hr, hr_denoising
+    
+    @staticmethod
+    def max_batch_for(width: int, height: int) -> int:
+        """
+        Размер пакета панелей для заданного разрешения.
+        
+        До 768x512 в память GPU помещается 4 изображения с upscaling,
+        для больших разрешений пакет уменьшается до 2.
+        
+        Args:
+            width: Ширина изображения
+            height: Высота изображения
+            
+        Returns:
+            Максимальное количество панелей в одном запросе
+        """
+        return 4 if width * height <= 768 * 512 else 2
+    
+    def _unique_prompts(self,
+                        panels: List[ComicPanel],
+                        style: str,
+                        width: int = 768,
+                        height: int = 512) -> Tuple[List[List[Any]], List[int]]:
+        """
+        Построение промптов панелей без повторов.
+        
+        Панели с одинаковыми персонажами, настроением и сценой дают один
+        и тот же промпт, такое изображение достаточно сгенерировать один раз.
+        
+        Args:
+            panels: Панели комикса
+            style: Стиль изображения
+            width: Ширина изображения
+            height: Высота изображения
+            
+        Returns:
+            Кортеж (уникальные [prompt, negative_prompt, importance],
+            индекс уникального промпта для каждой панели); importance -
+            максимальная среди панелей с этим промптом
+        """
+        style_prefix = self.build_style_prefix(style)
+        index_by_digest: Dict[bytes, int] = {}
+        unique: List[List[Any]] = []
+        panel_index: List[int] = []
+        
+        for panel in panels:
+            prompt, negative_prompt = self.build_optimized_prompt(
+                panel.scene_description,
+                panel.dialogue,
+                panel.characters,
+                panel.mood,
+                style,
+                style_prefix
+            )
+            digest = hashlib.blake2b(
+                f"{prompt}\0{negative_prompt}\0{width}x{height}".encode("utf-8"), digest_size=16
+            ).digest()
+            idx = index_by_digest.get(digest)
+            if idx is None:
+                idx = index_by_digest[digest] = len(unique)
+                unique.append([prompt, negative_prompt, panel.importance])
+            else:
+                unique[idx][2] = max(unique[idx][2], panel.importance)
+            panel_index.append(idx)
+        
+        if len(unique) < len(panels):
+            logger.info(f"Одинаковых промптов: {len(panels) - len(unique)}, изображения будут переиспользованы")
+        
+        return unique, panel_index
+    
+    def generate_panels_batch(self,
+                              panels: List[ComicPanel],
+                              style: str = StyleType.EDUCATIONAL.value,
+                              max_batch: Optional[int] = None,
+                              width: int = 768,
+                              height: int = 512) -> List[Optional[bytes]]:
+        """
+        Генерация изображений для нескольких панелей пакетными запросами.
+        
+        txt2img с batch_size повторяет один и тот же промпт, поэтому разные
+        промпты панелей передаются построчно через встроенный скрипт
+        "prompts from file or textbox": один HTTP запрос на группу панелей.
+        
+        Args:
+            panels: Панели комикса
+            style: Стиль изображения
+            max_batch: Максимальное количество панелей в одном запросе
+                (по умолчанию зависит от разрешения, см. max_batch_for)
+            width: Ширина изображения
+            height: Высота изображения
+            
+        Returns:
+            Список данных изображений в порядке панелей (None для панелей,
+            которые не удалось получить пакетом)
+        """
+        if max_batch is None:
+            max_batch = self.max_batch_for(width, height)
+        
+        unique, panel_index = self._unique_prompts(panels, style, width, height)
+        results: List[Optional[bytes]] = [None] * len(unique)
+        
+        for start in range(0, len(unique), max_batch):
+            chunk = unique[start:start + max_batch]
+            prompts = [prompt for prompt, _, _ in chunk]
+            negative_prompt = chunk[-1][1]
+            
+            # Один запрос на группу: качество по самой важной панели группы
+            steps, enable_hr, hr_denoising = self.fidelity_for(max(imp for _, _, imp in chunk))
+            payload = self._build_payload(
+                prompts[0], negative_prompt, steps, width, height, enable_hr, hr_denoising
+            )
+            payload["script_name"] = "prompts from file or textbox"
+            payload["script_args"] = [False, False, "start", "\n".join(prompts)]
+            
+            try:
+                response = self.session.post(
+                    f"{self.api_base}/sdapi/v1/txt2img",
+                    data=json_dumps(payload),
+                    headers=JSON_HEADERS,
+                    timeout=600 * len(chunk)
+                )
+                
+                if response.status_code != 200:
+                    # Сервер не поддерживает скрипт: остальные группы тоже не пройдут
+                    logger.warning(f"Пакетная генерация недоступна: HTTP {response.status_code}")
+                    break
+                
+                images = json_loads(response.content).get("images", [])
+                if len(images) < len(chunk):
+                    logger.warning(f"Пакетная генерация вернула {len(images)} из {len(chunk)} изображений")
+                    continue
+                
+                # Берем последние изображения: сервер может добавить сетку в начало
+                for offset, (prompt, image) in enumerate(zip(prompts, images[-len(chunk):])):
+                    image_data = base64.b64decode(image)
+                    if self.prompt_cache is not None:
+                        self.prompt_cache.store(prompt, negative_prompt, width, height, image_data)
+                    results[start + offset] = image_data
+                
+            except Exception as e:
+                logger.warning(f"Ошибка пакетной генерации: {e}")
+        
+        return [results[i] for i in panel_index]
+    
     def generate_panel_image(self, 
                            panel: ComicPanel, 
-                           style: str = StyleType.EDUCATIONAL.value) -> Optional[bytes]:
+                           style: str = StyleType.EDUCATIONAL.value,
+                           style_prefix: Optional[str] = None) -> Optional[bytes]:
         """
         Генерация изображения для панели комикса.
         
         Args:
             panel: Панель комикса
             style: Стиль изображения
+            style_prefix: Готовый префикс стиля из build_style_prefix
             
         Returns:
             Данные изображения в байтах или None при ошибке
@@ -208,12 +665,16 @@ dark lighting, confusing layout, cluttered composition
             panel.dialogue, 
             panel.characters, 
             panel.mood, 
-            style
+            style,
+            style_prefix
         )
         
         logger.debug(f"Промпт: {prompt[:100]}...")
         
-        image_data = self.generate_with_enhanced_settings(prompt, negative_prompt)
+        steps, enable_hr, hr_denoising = self.fidelity_for(panel.importance)
+        image_data = self.generate_with_enhanced_settings(
+            prompt, negative_prompt, steps, enable_hr=enable_hr, hr_denoising=hr_denoising
+        )
         
         if image_data:
             logger.info(f"Изображение успешно сгенерировано для {panel.panel_id}")
@@ -234,8 +695,13 @@ dark lighting, confusing layout, cluttered composition
             True если сохранение успешно
         """
         try:
-            image = Image.open(io.BytesIO(image_data))
-            image.save(filename)
+            if image_data.startswith(_PNG_MAGIC) and filename.lower().endswith(".png"):
+                # SD уже отдает PNG: пишем байты как есть, без декодирования и пережатия
+                with open(filename, "wb") as f:
+                    f.write(image_data)
+            else:
+                image = Image.open(io.BytesIO(image_data))
+                image.save(filename)
             logger.info(f"Изображение сохранено: {filename}")
             return True
         except Exception as e:
@@ -257,6 +723,11 @@ dark lighting, confusing layout, cluttered composition
         Returns:
             Данные изображения в байтах
         """
+        # Заглушка не зависит от панели, поэтому кодируется один раз на размер
+        cached = self._placeholder_cache.get((width, height))
+        if cached is not None:
+            return cached
+        
         try:
             # Создаем простое изображение-заглушку
             image = Image.new('RGB', (width, height), color='#4CAF50')
@@ -264,9 +735,11 @@ dark lighting, confusing layout, cluttered composition
             # Добавляем текст (требует pillow с поддержкой шрифтов)
             # Здесь можно добавить рисование текста, если нужно
             
+            # Однотонная картинка сжимается почти в ноль и на быстром уровне
             buffer = io.BytesIO()
-            image.save(buffer, format='PNG')
-            return buffer.getvalue()
+            image.save(buffer, format='PNG', optimize=False, compress_level=1)
+            self._placeholder_cache[(width, height)] = buffer.getvalue()
+            return self._placeholder_cache[(width, height)]
             
         except Exception as e:
             logger.error(f"Ошибка создания заглушки: {e}")
@@ -3,29 +3,61 @@
 """
 
 from crewai import Agent, Task, Crew, Process
+import asyncio
 import json
 import re
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from ..models.comic_models import (
     ComicCharacter, ComicPanel, ProcessInfo, 
     MoodType, StyleType
 )
 from ..services.llm_service import CustomOllamaLLM
+from ..utils.json_utils import loads as json_loads
 
 logger = logging.getLogger(__name__)
 
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+_JSON_DECODER = json.JSONDecoder()
+
+# Метки ролей для сценария, который пишется параллельно с персонажами:
+# главный герой, наставник и дополнительный персонаж
+ROLE_PLACEHOLDERS = ("[ГЕРОЙ]", "[НАСТАВНИК]", "[ПЕРСОНАЖ]")
+
+# Важность панели, если модель не указала ее или указала не числом
+DEFAULT_IMPORTANCE = 0.5
+
+
+def _parse_importance(value: Any) -> float:
+    """
+    Приведение важности панели из ответа LLM к числу от 0 до 1.
+    
+    Args:
+        value: Значение поля importance, например 0.8 или "0.8"
+        
+    Returns:
+        Важность панели или DEFAULT_IMPORTANCE для некорректного значения
+    """
+    try:
+        importance = float(value)
+    except (TypeError, ValueError):
+        return DEFAULT_IMPORTANCE
+    if importance != importance:  # NaN
+        return DEFAULT_IMPORTANCE
+    return min(max(importance, 0.0), 1.0)
+
 
 class ScenarioGenerator:
     """Генератор сценариев для образовательных комиксов."""
     
-    def __init__(self, llm: CustomOllamaLLM):
+    def __init__(self, llm: CustomOllamaLLM, verbose: bool = False):
         """
         Инициализация генератора сценариев.
         
         Args:
             llm: Экземпляр LLM для работы с агентами
+            verbose: Выводить рассуждения агентов в stdout (для отладки)
         """
         self.llm = llm
         
@@ -36,7 +68,7 @@ class ScenarioGenerator:
             backstory="""Ты эксперт по созданию персонажей для образовательного контента. 
             Твои персонажи должны быть релевантными, запоминающимися и подходящими для целевой аудитории.""",
             llm=llm,
-            verbose=True
+            verbose=verbose
         )
         
         # Агент для создания сюжета
@@ -46,32 +78,39 @@ class ScenarioGenerator:
             backstory="""Ты мастер сторителлинга в образовательной сфере. Умеешь превращать 
             скучные процедуры в захватывающие истории с четкой структурой и логикой.""",
             llm=llm,
-            verbose=True
+            verbose=verbose
         )
     
-    def create_characters(self, 
-                         process_info: ProcessInfo, 
-                         target_audience: str) -> List[ComicCharacter]:
+    def build_characters_task(self,
+                              process_info: Optional[ProcessInfo],
+                              target_audience: str,
+                              context: Optional[List[Task]] = None) -> Task:
         """
-        Создание персонажей на основе процесса.
+        Создание задачи на придумывание персонажей.
         
         Args:
-            process_info: Информация о процессе
+            process_info: Информация о процессе или None, если процесс
+                берется из результата задачи анализа в context
             target_audience: Целевая аудитория
+            context: Задачи, результаты которых передаются агенту
             
         Returns:
-            Список персонажей комикса
+            Задача CrewAI
         """
-        logger.info("Создание персонажей комикса...")
-        
-        participants = [p.to_dict() for p in process_info.participants]
+        if process_info is not None:
+            participants = [p.to_dict() for p in process_info.participants]
+            process_block = (
+                f"ПРОЦЕСС: {process_info.process_name}\n"
+                f"УЧАСТНИКИ ПРОЦЕССА: {participants}"
+            )
+        else:
+            process_block = "ПРОЦЕСС И УЧАСТНИКИ: из результата анализа документа"
         
-        task = Task(
+        return Task(
             description=f"""
 Создай 2-3 персонажа для комикса на основе процесса:
 
-ПРОЦЕСС: {process_info.process_name}
-УЧАСТНИКИ ПРОЦЕССА: {participants}
+{process_block}
 ЦЕЛЕВАЯ АУДИТОРИЯ: {target_audience}
 
 ТРЕБОВАНИЯ К ПЕРСОНАЖАМ:
@@ -97,52 +136,59 @@ class ScenarioGenerator:
 ]
 """,
             expected_output="JSON массив с персонажами",
-            agent=self.character_creator
+            agent=self.character_creator,
+            context=context
         )
-        
-        try:
-            crew = Crew(agents=[self.character_creator], tasks=[task], process=Process.sequential)
-            result = crew.kickoff()
-            
-            characters_data = self._parse_json_array_from_response(str(result))
-            if characters_data:
-                return [ComicCharacter.from_dict(char) for char in characters_data]
-            
-        except Exception as e:
-            logger.error(f"Ошибка создания персонажей: {e}")
-        
-        # Возвращаем персонажей по умолчанию
-        return self._get_default_characters()
     
-    def create_scenario(self, 
-                       process_info: ProcessInfo,
-                       characters: List[ComicCharacter], 
-                       target_audience: str, 
-                       num_panels: int = 8) -> List[ComicPanel]:
+    def build_scenario_task(self,
+                            process_info: Optional[ProcessInfo],
+                            characters: Optional[List[ComicCharacter]],
+                            target_audience: str,
+                            num_panels: int = 8,
+                            context: Optional[List[Task]] = None,
+                            use_role_placeholders: bool = False) -> Task:
         """
-        Создание сценария комикса.
+        Создание задачи на написание сценария.
         
         Args:
-            process_info: Информация о процессе
-            characters: Персонажи комикса
+            process_info: Информация о процессе или None, если процесс
+                берется из результатов задач в context
+            characters: Персонажи комикса или None (берутся из context)
             target_audience: Целевая аудитория
             num_panels: Количество панелей
+            context: Задачи, результаты которых передаются агенту
+            use_role_placeholders: Обозначать персонажей метками ролей
+                из ROLE_PLACEHOLDERS вместо имен
             
         Returns:
-            Список панелей комикса
+            Задача CrewAI
         """
-        logger.info(f"Создание сценария на {num_panels} панелей...")
+        if process_info is not None:
+            steps = [s.to_dict() for s in process_info.steps]
+            process_block = (
+                f"ПРОЦЕСС: {process_info.process_name}\n"
+                f"ЭТАПЫ: {steps}"
+            )
+        else:
+            process_block = "ПРОЦЕСС И ЭТАПЫ: из результата анализа документа"
         
-        char_descriptions = [f"{char.name} ({char.role})" for char in characters]
-        steps = [s.to_dict() for s in process_info.steps]
+        if use_role_placeholders:
+            hero, mentor, extra = ROLE_PLACEHOLDERS
+            process_block += (
+                f"\nПЕРСОНАЖИ: вместо имен используй метки {hero} (главный герой), "
+                f"{mentor} (опытный специалист) и {extra} (дополнительный персонаж)"
+            )
+        elif characters is not None:
+            char_descriptions = [f"{char.name} ({char.role})" for char in characters]
+            process_block += f"\nПЕРСОНАЖИ: {char_descriptions}"
+        else:
+            process_block += "\nПЕРСОНАЖИ: из результата создания персонажей"
         
-        task = Task(
+        return Task(
             description=f"""
 Создай сценарий комикса на {num_panels} панелей:
 
-ПРОЦЕСС: {process_info.process_name}
-ЭТАПЫ: {steps}
-ПЕРСОНАЖИ: {char_descriptions}
+{process_block}
 АУДИТОРИЯ: {target_audience}
 
 СТРУКТУРА ИСТОРИИ:
@@ -177,27 +223,68 @@ class ScenarioGenerator:
 ]
 """,
             expected_output="JSON массив с панелями комикса",
-            agent=self.story_creator
+            agent=self.story_creator,
+            context=context
         )
+    
+    def create_characters(self, 
+                         process_info: ProcessInfo, 
+                         target_audience: str) -> List[ComicCharacter]:
+        """
+        Создание персонажей на основе процесса.
+        
+        Args:
+            process_info: Информация о процессе
+            target_audience: Целевая аудитория
+            
+        Returns:
+            Список персонажей комикса
+        """
+        logger.info("Создание персонажей комикса...")
+        
+        task = self.build_characters_task(process_info, target_audience)
+        
+        try:
+            crew = Crew(agents=[self.character_creator], tasks=[task], process=Process.sequential)
+            result = crew.kickoff()
+            
+            characters = self.parse_characters(str(result))
+            if characters:
+                return characters
+            
+        except Exception as e:
+            logger.error(f"Ошибка создания персонажей: {e}")
+        
+        # Возвращаем персонажей по умолчанию
+        return self._get_default_characters()
+    
+    def create_scenario(self, 
+                       process_info: ProcessInfo,
+                       characters: List[ComicCharacter], 
+                       target_audience: str, 
+                       num_panels: int = 8) -> List[ComicPanel]:
+        """
+        Создание сценария комикса.
+        
+        Args:
+            process_info: Информация о процессе
+            characters: Персонажи комикса
+            target_audience: Целевая аудитория
+            num_panels: Количество панелей
+            
+        Returns:
+            Список панелей комикса
+        """
+        logger.info(f"Создание сценария на {num_panels} панелей...")
+        
+        task = self.build_scenario_task(process_info, characters, target_audience, num_panels)
         
         try:
             crew = Crew(agents=[self.story_creator], tasks=[task], process=Process.sequential)
             result = crew.kickoff()
             
-            panels_data = self._parse_json_array_from_response(str(result))
-            if panels_data:
-                panels = []
-                for i, panel_data in enumerate(panels_data):
-                    panel = ComicPanel(
-                        panel_id=panel_data.get('panel_id', f'panel_{i+1}'),
-                        scene_description=panel_data.get('scene_description', ''),
-                        dialogue=panel_data.get('dialogue', ''),
-                        visual_prompt="",  # Будет создан позже
-                        characters=panel_data.get('characters', []),
-                        mood=panel_data.get('mood', MoodType.NEUTRAL.value),
-                        importance=panel_data.get('importance', 0.5)
-                    )
-                    panels.append(panel)
+            panels = self.parse_panels(str(result))
+            if panels:
                 return panels
                 
         except Exception as e:
@@ -206,6 +293,156 @@ class ScenarioGenerator:
         # Возвращаем базовый сценарий
         return self._get_default_scenario(characters)
     
+    def create_scenario_skeleton(self,
+                                 process_info: ProcessInfo,
+                                 target_audience: str,
+                                 num_panels: int = 8) -> List[ComicPanel]:
+        """
+        Создание сценария без имен персонажей.
+        
+        Персонажи обозначены метками ROLE_PLACEHOLDERS, поэтому сценарий
+        можно писать одновременно с персонажами и подставить имена позже
+        через bind_characters.
+        
+        Args:
+            process_info: Информация о процессе
+            target_audience: Целевая аудитория
+            num_panels: Количество панелей
+            
+        Returns:
+            Список панелей или пустой список при ошибке
+        """
+        logger.info(f"Создание сценария с ролями на {num_panels} панелей...")
+        
+        task = self.build_scenario_task(
+            process_info, None, target_audience, num_panels, use_role_placeholders=True
+        )
+        
+        try:
+            crew = Crew(agents=[self.story_creator], tasks=[task], process=Process.sequential)
+            result = crew.kickoff()
+            return self.parse_panels(str(result))
+        except Exception as e:
+            logger.error(f"Ошибка создания сценария с ролями: {e}")
+        
+        return []
+    
+    async def acreate_characters(self,
+                                 process_info: ProcessInfo,
+                                 target_audience: str) -> List[ComicCharacter]:
+        """
+        Асинхронное создание персонажей в пуле потоков.
+        
+        Args:
+            process_info: Информация о процессе
+            target_audience: Целевая аудитория
+            
+        Returns:
+            Список персонажей комикса
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self.create_characters, process_info, target_audience
+        )
+    
+    async def acreate_scenario_skeleton(self,
+                                        process_info: ProcessInfo,
+                                        target_audience: str,
+                                        num_panels: int = 8) -> List[ComicPanel]:
+        """
+        Асинхронное создание сценария с метками ролей в пуле потоков.
+        
+        Args:
+            process_info: Информация о процессе
+            target_audience: Целевая аудитория
+            num_panels: Количество панелей
+            
+        Returns:
+            Список панелей или пустой список при ошибке
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self.create_scenario_skeleton, process_info, target_audience, num_panels
+        )
+    
+    def bind_characters(self,
+                        panels: List[ComicPanel],
+                        characters: List[ComicCharacter]) -> List[ComicPanel]:
+        """
+        Подстановка имен персонажей вместо меток ролей.
+        
+        Если персонажей меньше, чем ролей, лишние роли получают имя
+        последнего персонажа.
+        
+        Args:
+            panels: Панели сценария с метками ROLE_PLACEHOLDERS
+            characters: Созданные персонажи
+            
+        Returns:
+            Те же панели с подставленными именами
+        """
+        names = [char.name for char in characters] or [
+            char.name for char in self._get_default_characters()
+        ]
+        names += [names[-1]] * (len(ROLE_PLACEHOLDERS) - len(names))
+        
+        replacements = list(zip(ROLE_PLACEHOLDERS, names))
+        # В списке участников модель иногда пишет роль без скобок
+        by_role = {}
+        for placeholder, name in replacements:
+            by_role[placeholder] = name
+            by_role[placeholder.strip("[]")] = name
+        
+        for panel in panels:
+            for placeholder, name in replacements:
+                panel.scene_description = panel.scene_description.replace(placeholder, name)
+                panel.dialogue = panel.dialogue.replace(placeholder, name)
+            panel.characters = [by_role.get(c, c) for c in panel.characters]
+        
+        return panels
+    
+    def parse_characters(self, response: str) -> List[ComicCharacter]:
+        """
+        Извлечение персонажей из ответа агента.
+        
+        Args:
+            response: Ответ от LLM
+            
+        Returns:
+            Список персонажей или пустой список
+        """
+        characters_data = self._parse_json_array_from_response(response)
+        return [ComicCharacter.from_dict(char) for char in characters_data]
+    
+    def parse_panels(self, response: str) -> List[ComicPanel]:
+        """
+        Извлечение панелей сценария из ответа агента.
+        
+        Args:
+            response: Ответ от LLM
+            
+        Returns:
+            Список панелей или пустой список
+        """
+        panels_data = self._parse_json_array_from_response(response)
+        # null вместо строк и списков заменяется пустыми значениями,
+        # чтобы bind_characters и генерация промптов работали со строками
+        return [
+            ComicPanel(
+                panel_id=str(panel_data.get('panel_id') or f'panel_{i+1}'),
+                scene_description=str(panel_data.get('scene_description') or ''),
+                dialogue=str(panel_data.get('dialogue') or ''),
+                visual_prompt="",  # Будет создан позже
+                characters=[
+                    name for name in panel_data.get('characters') or ()
+                    if isinstance(name, str)
+                ],
+                mood=str(panel_data.get('mood') or MoodType.NEUTRAL.value),
+                importance=_parse_importance(panel_data.get('importance'))
+            )
+            for i, panel_data in enumerate(panels_data)
+        ]
+    
     def _parse_json_array_from_response(self, response: str) -> List[Dict[str, Any]]:
         """
         Извлечение JSON массива из ответа LLM.
@@ -214,14 +451,26 @@ class ScenarioGenerator:
             response: Ответ от LLM
             
         Returns:
-            Распарсенный JSON массив или пустой список
+            Объекты распарсенного JSON массива или пустой список
         """
         try:
-            # Ищем JSON массив в ответе
-            json_match = re.search(r'\\[.*\\]', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                return json.loads(json_str)
+            data = None
+            
+            # Разбираем массив от первой квадратной скобки без regex-поиска
+            start = response.find('[')
+            if start != -1:
+                try:
+                    data, _ = _JSON_DECODER.raw_decode(response, start)
+                except ValueError:
+                    pass
+            
+            # Запасной вариант: от первой до последней квадратной скобки
+            if not isinstance(data, list):
+                json_match = _JSON_ARRAY_RE.search(response)
+                data = json_loads(json_match.group()) if json_match else []
+            
+            # Строки и числа вместо объектов модель пишет при сбое формата
+            return [item for item in data if isinstance(item, dict)]
         except Exception as e:
             logger.warning(f"Ошибка парсинга JSON массива: {e}")
         
@@ -4,7 +4,10 @@
 """
 
 import argparse
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import os
 from pathlib import Path
@@ -26,13 +29,31 @@ def setup_logging(log_level: str = "INFO"):
     Args:
         log_level: Уровень логирования
     """
+    formatter = logging.Formatter(Settings.LOG_FORMAT)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    file_handler = logging.FileHandler("comic_generator.log", encoding="utf-8")
+    file_handler.setFormatter(formatter)
+    # В файл пишутся только проблемы, кроме режима отладки
+    if log_level.upper() != "DEBUG":
+        file_handler.setLevel(logging.WARNING)
+    
+    # Потоки генерации только кладут записи в очередь, запись в stdout
+    # и файл выполняет отдельный поток слушателя
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # Окончательное оформление записи делают обработчики слушателя
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    
     logging.basicConfig(
         level=getattr(logging, log_level.upper()),
-        format=Settings.LOG_FORMAT,
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler("comic_generator.log", encoding="utf-8")
-        ]
+        handlers=[queue_handler]
     )
 
 
@@ -167,6 +188,9 @@ def main():
         except Exception as e:
             print(f"⚠️ Ошибка загрузки конфигурации: {e}")
     
+    # Рассуждения агентов выводятся только в режиме отладки
+    config["verbose"] = args.log_level == "DEBUG"
+    
     # Создание генератора
     try:
         generator = ComicGenerator(config)
@@ -3,12 +3,13 @@
 """
 
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from operator import methodcaller
+from typing import List, Dict, Any, FrozenSet, Optional
 from enum import Enum
 
 
-class MoodType(Enum):
-    """Типы настроения для панелей комикса."""
+class MoodType(str, Enum):
+    """Типы настроения для панелей комикса (члены равны своим строкам)."""
     FRIENDLY = "дружелюбный"
     PROFESSIONAL = "профессиональный"
     EXPLAINING = "объясняющий"
@@ -17,17 +18,30 @@ class MoodType(Enum):
     CONFUSED = "озадаченный"
 
 
-class StyleType(Enum):
-    """Стили изображений."""
+class StyleType(str, Enum):
+    """Стили изображений (члены равны своим строкам)."""
     PROFESSIONAL = "professional"
     FRIENDLY = "friendly"
     EDUCATIONAL = "educational"
     NARRATIVE = "narrative"
 
 
+# Допустимые значения для проверки через хэш без обхода Enum
+MOOD_VALUES: FrozenSet[str] = frozenset(m.value for m in MoodType)
+STYLE_VALUES: FrozenSet[str] = frozenset(s.value for s in StyleType)
+
+# Вызов to_dict для map: обход списков моделей без кадра Python на элемент
+_TO_DICT = methodcaller("to_dict")
+
+
 @dataclass
 class ComicPanel:
     """Структура данных для панели комикса."""
+    __slots__ = (
+        "panel_id", "scene_description", "dialogue", "visual_prompt",
+        "characters", "mood", "importance"
+    )
+    
     panel_id: str
     scene_description: str
     dialogue: str
@@ -62,9 +76,11 @@ class ComicPanel:
         )
 
 
-@dataclass
+@dataclass(frozen=True)
 class ComicCharacter:
-    """Структура данных для персонажа."""
+    """Структура данных для персонажа (неизменяемая, можно хэшировать)."""
+    __slots__ = ("name", "description", "personality", "role", "visual_style")
+    
     name: str
     description: str
     personality: str
@@ -81,6 +97,12 @@ class ComicCharacter:
             "visual_style": self.visual_style
         }
 
+    def __reduce__(self):
+        """Поддержка pickle: frozen-класс со __slots__ нельзя восстановить через setattr."""
+        return (self.__class__, (
+            self.name, self.description, self.personality, self.role, self.visual_style
+        ))
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "ComicCharacter":
         """Создание из словаря."""
@@ -96,6 +118,8 @@ class ComicCharacter:
 @dataclass
 class ProcessStep:
     """Шаг процесса."""
+    __slots__ = ("step_number", "action", "description", "responsible")
+    
     step_number: int
     action: str
     description: str
@@ -113,6 +137,8 @@ class ProcessStep:
 @dataclass
 class ProcessParticipant:
     """Участник процесса."""
+    __slots__ = ("role", "description")
+    
     role: str
     description: str
 
@@ -126,6 +152,8 @@ class ProcessParticipant:
 @dataclass
 class ProcessInfo:
     """Информация о процессе из документа."""
+    __slots__ = ("process_name", "participants", "steps", "rules", "outcome")
+    
     process_name: str
     participants: List[ProcessParticipant]
     steps: List[ProcessStep]
@@ -135,8 +163,8 @@ class ProcessInfo:
     def to_dict(self) -> Dict[str, Any]:
         return {
             "process_name": self.process_name,
-            "participants": [p.to_dict() for p in self.participants],
-            "steps": [s.to_dict() for s in self.steps],
+            "participants": list(map(_TO_DICT, self.participants)),
+            "steps": list(map(_TO_DICT, self.steps)),
             "rules": self.rules,
             "outcome": self.outcome
         }
@@ -163,6 +191,8 @@ class ProcessInfo:
 @dataclass
 class ComicData:
     """Полные данные комикса."""
+    __slots__ = ("process_info", "characters", "panels", "metadata")
+    
     process_info: ProcessInfo
     characters: List[ComicCharacter]
     panels: List[ComicPanel]
@@ -171,7 +201,7 @@ class ComicData:
     def to_dict(self) -> Dict[str, Any]:
         return {
             "process_info": self.process_info.to_dict(),
-            "characters": [c.to_dict() for c in self.characters],
-            "panels": [p.to_dict() for p in self.panels],
+            "characters": list(map(_TO_DICT, self.characters)),
+            "panels": list(map(_TO_DICT, self.panels)),
             "metadata": self.metadata
         }
\ No newline at end of file
@@ -2,22 +2,55 @@
 Сервис для работы с документами (PDF и другими форматами).
 """
 
-from langchain_community.document_loaders import PyPDFLoader
-from typing import List, Optional
+from pypdf import PdfReader
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import hashlib
+import io
 import logging
+import mmap
 import os
+import re
 
 logger = logging.getLogger(__name__)
 
+# Текст до последнего знака конца предложения, за которым идет пробел
+_LAST_SENT_RE = re.compile(r'.*[.!?](?=\s)', re.DOTALL)
+
 
 class DocumentService:
     """Сервис для загрузки и обработки документов."""
     
+    # Извлеченный текст PDF по SHA-256 содержимого файла
+    _CACHE_DIR = ".pdf_cache"
+    
     @staticmethod
-    def load_pdf(file_path: str) -> Optional[str]:
+    def _file_digest(file_path: str) -> str:
+        """
+        SHA-256 содержимого файла, читаемого блоками.
+        
+        Args:
+            file_path: Путь к файлу
+            
+        Returns:
+            Хэш в шестнадцатеричном виде
+        """
+        with open(file_path, 'rb') as f:
+            if hasattr(hashlib, "file_digest"):  # Python 3.11+
+                return hashlib.file_digest(f, "sha256").hexdigest()
+            digest = hashlib.sha256()
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+            return digest.hexdigest()
+    
+    @classmethod
+    def load_pdf(cls, file_path: str) -> Optional[str]:
         """
         Загрузка текста из PDF файла.
         
+        Текст кэшируется на диске по хэшу содержимого, поэтому повторная
+        загрузка того же документа не разбирает PDF заново.
+        
         Args:
             file_path: Путь к PDF файлу
             
@@ -25,22 +58,47 @@ class DocumentService:
             Извлеченный текст или None в случае ошибки
         """
         try:
-            if not os.path.exists(file_path):
+            if os.fspath(file_path)[-4:].lower() != '.pdf':
+                logger.error(f"Файл должен быть в формате PDF: {file_path}")
+                return None
+            
+            # Один stat вместо exists: заодно отсекаем пустые файлы до разбора
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
                 logger.error(f"Файл не найден: {file_path}")
                 return None
-                
-            if not file_path.lower().endswith('.pdf'):
-                logger.error(f"Файл должен быть в формате PDF: {file_path}")
+            
+            if not st.st_size:
+                logger.warning(f"PDF файл пустой: {file_path}")
                 return None
             
-            loader = PyPDFLoader(file_path)
-            pages = loader.load()
+            cache_file = os.path.join(cls._CACHE_DIR, cls._file_digest(file_path) + ".txt")
+            if os.path.exists(cache_file):
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    text = f.read()
+                logger.info(f"PDF загружен из кэша: {file_path}, символов: {len(text)}")
+                return text
+            
+            # Файл отображается в память: ядро подгружает страницы по мере
+            # чтения без копирования через буферы Python. Текст страниц
+            # сразу пишется в общий буфер и не накапливается списком
+            buffer = io.StringIO()
+            pages_count = 0
+            with open(file_path, 'rb') as pdf_file, \
+                    mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for page in PdfReader(mm).pages:
+                    if pages_count:
+                        buffer.write("\n")
+                    buffer.write(page.extract_text())
+                    pages_count += 1
             
-            if not pages:
+            if not pages_count:
                 logger.warning(f"PDF файл пустой: {file_path}")
                 return None
             
-            text = "\n".join([page.page_content for page in pages])
+            text = buffer.getvalue()
+            cls._write_cache(cache_file, text)
             
             logger.info(f"Успешно загружен PDF: {file_path}, символов: {len(text)}")
             return text
@@ -49,6 +107,45 @@ class DocumentService:
             logger.error(f"Ошибка загрузки PDF {file_path}: {e}")
             return None
     
+    @classmethod
+    def load_pdfs(cls, paths: List[str], workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+        """
+        Загрузка нескольких PDF файлов параллельно в отдельных процессах.
+        
+        Разбор PDF занимает процессор и держит GIL, поэтому используются
+        процессы, а не потоки. Кэш текста общий для всех процессов.
+        
+        Args:
+            paths: Пути к PDF файлам
+            workers: Количество процессов (по умолчанию по числу ядер)
+            
+        Returns:
+            Словарь путь -> извлеченный текст или None при ошибке
+        """
+        if len(paths) < 2:
+            return {path: cls.load_pdf(path) for path in paths}
+        
+        with ProcessPoolExecutor(max_workers=workers or min(len(paths), os.cpu_count() or 1)) as executor:
+            return dict(zip(paths, executor.map(cls.load_pdf, paths)))
+    
+    @staticmethod
+    def _write_cache(cache_file: str, text: str) -> None:
+        """
+        Атомарная запись текста в кэш: файл появляется только целиком.
+        
+        Args:
+            cache_file: Путь к файлу кэша
+            text: Извлеченный текст
+        """
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить кэш PDF {cache_file}: {e}")
+    
     @staticmethod
     def load_text_file(file_path: str, encoding: str = 'utf-8') -> Optional[str]:
         """
@@ -62,13 +159,13 @@ class DocumentService:
             Содержимое файла или None в случае ошибки
         """
         try:
-            if not os.path.exists(file_path):
+            try:
+                with open(file_path, 'r', encoding=encoding) as file:
+                    content = file.read()
+            except FileNotFoundError:
                 logger.error(f"Файл не найден: {file_path}")
                 return None
             
-            with open(file_path, 'r', encoding=encoding) as file:
-                content = file.read()
-            
             logger.info(f"Успешно загружен текстовый файл: {file_path}, символов: {len(content)}")
             return content
             
@@ -112,14 +209,16 @@ class DocumentService:
         if not content:
             return ""
         
-        # Берем начало документа для краткого содержания
-        summary = content[:max_length]
+        if len(content) <= max_length:
+            return content.strip()
         
-        # Обрезаем по последнему предложению если превышена длина
-        if len(content) > max_length:
-            last_period = summary.rfind('.')
-            if last_period > max_length // 2:  # Если есть точка в разумном месте
-                summary = summary[:last_period + 1]
-            summary += "..."
+        # Обрезаем по последнему предложению, закончившемуся до max_length;
+        # поиск ограничен max_length + 1 символами, чтобы видеть пробел после точки
+        match = _LAST_SENT_RE.match(content, 0, max_length + 1)
+        if match and match.end() - 1 > max_length // 2:  # Если конец предложения в разумном месте
+            cut = match.end()
+        else:
+            cut = max_length
         
-        return summary.strip()
\ No newline at end of file
+        # Хвост заканчивается на "...", поэтому достаточно lstrip без лишней копии
+        return content[:cut].lstrip() + "..."
\ No newline at end of file
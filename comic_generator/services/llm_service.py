@@ -3,12 +3,33 @@
 """
 
 from crewai.llm import LLM
+import functools
 import litellm
 import logging
-from typing import List, Dict, Any, Optional
+import requests
+import threading
+import time
+from typing import List, Dict, Any, Optional, Union
+
+from ..utils.json_utils import JSON_HEADERS, dumps as json_dumps, loads as json_loads
 
 logger = logging.getLogger(__name__)
 
+# Общая сессия для запросов к Ollama: соединение переиспользуется между вызовами
+_SESSION = requests.Session()
+
+# Параметры генерации из kwargs вызова и их имена в options Ollama
+_OLLAMA_OPTIONS = {
+    "temperature": "temperature",
+    "max_tokens": "num_predict",
+    "top_p": "top_p",
+    "top_k": "top_k",
+    "seed": "seed",
+    "stop": "stop",
+    "presence_penalty": "presence_penalty",
+    "frequency_penalty": "frequency_penalty"
+}
+
 
 class CustomOllamaLLM(LLM):
     """Кастомный LLM класс для работы с Ollama через litellm."""
@@ -26,43 +47,150 @@ class CustomOllamaLLM(LLM):
         self.temperature = 0.7
         self.max_tokens = 4000
         
-    def call(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        # Кэш последней проверки доступности
+        self._last_check_t: float = float("-inf")
+        self._last_check_ok: bool = False
+        
+    def call(self, messages: Union[str, List[Dict[str, str]]], **kwargs) -> str:
         """
         Вызов LLM для генерации ответа.
         
+        Запрос отправляется напрямую в /api/chat Ollama; при HTTP ошибке
+        или ответе неожиданного формата запрос повторяется через litellm.
+        
         Args:
             messages: Список сообщений для обработки
-            **kwargs: Дополнительные параметры
+            **kwargs: Дополнительные параметры, параметры генерации
+                (temperature, max_tokens, stop и др.) передаются в options
             
         Returns:
             Сгенерированный ответ
         """
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        
+        try:
+            return self._chat(messages, kwargs)
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            logger.warning("Прямой запрос к Ollama не удался, используется litellm: %s", e)
+        
         try:
+            # Параметры вызова переопределяют настройки экземпляра
+            params = {"temperature": self.temperature, "max_tokens": self.max_tokens}
+            params.update(kwargs)
             response = litellm.completion(
                 model=f"ollama/{self.model}",
                 api_base=self.api_base,
-                temperature=self.temperature,
                 messages=messages,
-                max_tokens=self.max_tokens,
-                **kwargs
+                **params
             )
             return response.choices[0].message.content
         except Exception as e:
             logger.error(f"Ошибка LLM: {e}")
             return "Произошла ошибка при обработке запроса."
     
-    def is_available(self) -> bool:
+    def _chat(self, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+        """
+        Запрос к /api/chat Ollama без слоя маршрутизации litellm.
+        
+        Args:
+            messages: Список сообщений для обработки
+            params: kwargs вызова; параметры генерации из них
+                переопределяют настройки экземпляра
+            
+        Returns:
+            Сгенерированный ответ
+        """
+        options: Dict[str, Any] = {
+            "temperature": self.temperature,
+            "num_predict": self.max_tokens
+        }
+        for key, option in _OLLAMA_OPTIONS.items():
+            value = params.get(key)
+            if value is not None:
+                options[option] = value
+        
+        response = _SESSION.post(
+            f"{self.api_base}/api/chat",
+            data=json_dumps({
+                "model": self.model,
+                "messages": messages,
+                "stream": False,
+                "options": options
+            }),
+            headers=JSON_HEADERS,
+            timeout=600
+        )
+        response.raise_for_status()
+        return json_loads(response.content)["message"]["content"]
+    
+    def is_available(self, ttl: float = 10.0) -> bool:
         """
         Проверка доступности LLM сервиса.
         
+        Вместо пробной генерации запрашивается список моделей /api/tags,
+        результат кэшируется на ttl секунд.
+        
+        Args:
+            ttl: Время жизни результата предыдущей проверки в секундах
+            
         Returns:
-            True если сервис доступен
+            True если сервис доступен и модель загружена
         """
+        now = time.monotonic()
+        if now - self._last_check_t < ttl:
+            return self._last_check_ok
+        
         try:
-            test_response = self.call([{"role": "user", "content": "test"}])
-            return bool(test_response)
+            response = _SESSION.get(f"{self.api_base}/api/tags", timeout=2)
+            names = {m.get("name", "") for m in json_loads(response.content).get("models", [])}
+            # Ollama добавляет к имени тег, по умолчанию ":latest"
+            available = response.status_code == 200 and (
+                self.model in names or f"{self.model}:latest" in names
+            )
         except Exception:
-            return False
+            available = False
+        
+        self._last_check_t = time.monotonic()
+        self._last_check_ok = available
+        return available
+
+
+# Экземпляры LLM общие для всех менеджеров с одинаковыми настройками
+_LLM_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=8)
+def _make_llm(model_name: str, api_base: str) -> CustomOllamaLLM:
+    """
+    Создание LLM для пары (модель, адрес API).
+    
+    Args:
+        model_name: Название модели
+        api_base: Базовый URL API
+        
+    Returns:
+        Экземпляр LLM
+    """
+    return CustomOllamaLLM(model_name, api_base)
+
+
+def get_shared_llm(model_name: str, api_base: str) -> CustomOllamaLLM:
+    """
+    Получение общего экземпляра LLM.
+    
+    Блокировка гарантирует, что при одновременном первом обращении из
+    нескольких потоков будет создан только один экземпляр.
+    
+    Args:
+        model_name: Название модели
+        api_base: Базовый URL API
+        
+    Returns:
+        Экземпляр LLM
+    """
+    with _LLM_LOCK:
+        return _make_llm(model_name, api_base)
 
 
 class LLMServiceManager:
@@ -76,7 +204,6 @@ class LLMServiceManager:
             config: Конфигурация для LLM
         """
         self.config = config or {}
-        self._llm_instance = None
     
     def get_llm(self) -> CustomOllamaLLM:
         """
@@ -85,12 +212,10 @@ class LLMServiceManager:
         Returns:
             Настроенный экземпляр LLM
         """
-        if self._llm_instance is None:
-            model_name = self.config.get("model_name", "llama3.1")
-            api_base = self.config.get("api_base", "http://127.0.0.1:11434")
-            self._llm_instance = CustomOllamaLLM(model_name, api_base)
-        
-        return self._llm_instance
+        return get_shared_llm(
+            self.config.get("model_name", "llama3.1"),
+            self.config.get("api_base", "http://127.0.0.1:11434")
+        )
     
     def validate_llm_connection(self) -> bool:
         """
@@ -2,16 +2,32 @@
 Менеджер для сохранения и загрузки данных комиксов.
 """
 
-import json
 import os
 import logging
-from datetime import datetime
+import time
 from typing import List, Dict, Any, Optional
 
 from ..models.comic_models import ComicData, ComicCharacter, ComicPanel, ProcessInfo
+from .json_utils import dumps as json_dumps, dumps_pretty, loads as json_loads, make_decoder
 
 logger = logging.getLogger(__name__)
 
+# Декодер сохраненного комикса по схеме моделей (None без msgspec)
+_COMIC_DECODER = make_decoder(ComicData)
+
+
+def iso_timestamp() -> str:
+    """
+    Текущее локальное время в формате datetime.now().isoformat().
+    
+    Строка собирается через time.strftime без создания объекта datetime.
+    
+    Returns:
+        Время вида 2024-01-31T12:34:56.789012
+    """
+    t = time.time()
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(t)) + f".{int(t * 1e6) % 1000000:06d}"
+
 
 class DataManager:
     """Менеджер для работы с данными комиксов."""
@@ -24,6 +40,7 @@ class DataManager:
             output_dir: Директория для сохранения файлов
         """
         self.output_dir = output_dir
+        self._output_dir_ok = False
         self._ensure_output_dir()
     
     def _ensure_output_dir(self):
@@ -31,6 +48,8 @@ class DataManager:
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
             logger.info(f"Создана директория: {self.output_dir}")
+        # Директория проверена один раз на время жизни менеджера
+        self._output_dir_ok = True
     
     def save_comic_data(self, 
                        comic_data: ComicData, 
@@ -46,16 +65,16 @@ class DataManager:
             Путь к сохраненному файлу
         """
         try:
-            data_dict = comic_data.to_dict()
-            
             # Добавляем метаданные
-            data_dict["metadata"]["saved_at"] = datetime.now().isoformat()
-            data_dict["metadata"]["version"] = "1.0"
+            comic_data.metadata["saved_at"] = iso_timestamp()
+            comic_data.metadata.setdefault("version", "1.0")
             
             filename = os.path.join(self.output_dir, f"{output_name}_data.json")
             
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(data_dict, f, ensure_ascii=False, indent=2)
+            # Модели кодируются напрямую, без промежуточного to_dict;
+            # файл читает программа, поэтому без отступов
+            with open(filename, "wb") as f:
+                f.write(json_dumps(comic_data))
             
             logger.info(f"Данные комикса сохранены: {filename}")
             return filename
@@ -79,21 +98,26 @@ class DataManager:
                 logger.error(f"Файл не найден: {filename}")
                 return None
             
-            with open(filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(filename, "rb") as f:
+                raw = f.read()
+            
+            if _COMIC_DECODER is not None:
+                try:
+                    comic_data = _COMIC_DECODER(raw)
+                    logger.info(f"Данные комикса загружены: {filename}")
+                    return comic_data
+                except Exception as e:
+                    # Например, в старом файле нет части полей
+                    logger.debug(f"Файл не совпал со схемой, разбор через словари: {e}")
+            
+            data = json_loads(raw)
             
             # Восстанавливаем объекты
             process_info = ProcessInfo.from_dict(data["process_info"])
             
-            characters = [
-                ComicCharacter.from_dict(char_data) 
-                for char_data in data["characters"]
-            ]
-            
-            panels = [
-                ComicPanel.from_dict(panel_data) 
-                for panel_data in data["panels"]
-            ]
+            # map вызывает from_dict без кадра list comprehension на элемент
+            characters = list(map(ComicCharacter.from_dict, data["characters"]))
+            panels = list(map(ComicPanel.from_dict, data["panels"]))
             
             comic_data = ComicData(
                 process_info=process_info,
@@ -123,8 +147,8 @@ class DataManager:
         try:
             filename = os.path.join(self.output_dir, f"{output_name}_config.json")
             
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
+            with open(filename, "wb") as f:
+                f.write(json_dumps(config))
             
             logger.info(f"Конфигурация сохранена: {filename}")
             return filename
@@ -153,7 +177,7 @@ class DataManager:
             
             summary = {
                 "project_name": output_name,
-                "created_at": datetime.now().isoformat(),
+                "created_at": iso_timestamp(),
                 "process_name": comic_data.process_info.process_name,
                 "characters_count": len(comic_data.characters),
                 "panels_count": len(comic_data.panels),
@@ -168,8 +192,8 @@ class DataManager:
             
             filename = os.path.join(self.output_dir, f"{output_name}_summary.json")
             
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(summary, f, ensure_ascii=False, indent=2)
+            with open(filename, "wb") as f:
+                f.write(dumps_pretty(summary))
             
             logger.info(f"Сводка проекта создана: {filename}")
             return filename
@@ -186,19 +210,18 @@ class DataManager:
             output_name: Базовое имя файлов для очистки
         """
         try:
-            temp_patterns = [
-                f"{output_name}_temp_*",
-                f"temp_{output_name}_*"
-            ]
-            
-            for pattern in temp_patterns:
-                import glob
-                for file_path in glob.glob(os.path.join(self.output_dir, pattern)):
+            temp_prefixes = (f"{output_name}_temp_", f"temp_{output_name}_")
+            
+            # Один проход по директории вместо glob на каждый шаблон
+            with os.scandir(self.output_dir) as entries:
+                for entry in entries:
+                    if not entry.name.startswith(temp_prefixes):
+                        continue
                     try:
-                        os.remove(file_path)
-                        logger.debug(f"Удален временный файл: {file_path}")
+                        os.remove(entry.path)
+                        logger.debug(f"Удален временный файл: {entry.path}")
                     except Exception as e:
-                        logger.warning(f"Не удалось удалить {file_path}: {e}")
+                        logger.warning(f"Не удалось удалить {entry.path}: {e}")
                         
         except Exception as e:
             logger.warning(f"Ошибка очистки временных файлов: {e}")
@@ -221,16 +244,20 @@ class DataManager:
             f"{output_name}_config.json"
         ]
         
-        for pattern in base_patterns:
-            file_path = os.path.join(self.output_dir, pattern)
-            if os.path.exists(file_path):
-                files.append(file_path)
+        if not os.path.isdir(self.output_dir):
+            return files
+        
+        # Один проход по директории вместо проверки каждого файла
+        with os.scandir(self.output_dir) as entries:
+            existing = {entry.name for entry in entries}
+        files.extend(
+            os.path.join(self.output_dir, name) for name in base_patterns if name in existing
+        )
         
         # Добавляем изображения если есть
-        images_dir = os.path.join(self.output_dir, f"{output_name}_images")
-        if os.path.exists(images_dir):
-            import glob
-            image_files = glob.glob(os.path.join(images_dir, "*.png"))
-            files.extend(image_files)
+        images_name = f"{output_name}_images"
+        if images_name in existing:
+            with os.scandir(os.path.join(self.output_dir, images_name)) as entries:
+                files.extend(entry.path for entry in entries if entry.name.endswith(".png"))
         
         return files
\ No newline at end of file
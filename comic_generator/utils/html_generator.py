@@ -2,216 +2,62 @@
 Генератор HTML для комиксов.
 """
 
-import base64
+import hashlib
+import html
 import os
+import re
 import logging
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, BinaryIO, Optional, Set, TextIO
+from urllib.parse import quote
 
 from ..models.comic_models import ComicPanel, ComicCharacter
 
 logger = logging.getLogger(__name__)
 
-
-class HTMLGenerator:
-    """Генератор HTML страниц для комиксов."""
-    
-    def __init__(self):
-        """Инициализация генератора HTML."""
-        pass
-    
-    def create_comic_html(self, 
-                         panels: List[ComicPanel], 
-                         characters: List[ComicCharacter],
-                         image_files: List[str], 
-                         output_name: str,
-                         title: str = "Образовательный комикс") -> str:
-        """
-        Создание HTML страницы комикса.
-        
-        Args:
-            panels: Список панелей комикса
-            characters: Список персонажей
-            image_files: Список путей к файлам изображений
-            output_name: Базовое имя для выходного файла
-            title: Заголовок комикса
-            
-        Returns:
-            Путь к созданному HTML файлу
-        """
-        logger.info(f"Создание HTML для комикса: {title}")
-        
-        # Создаем HTML для персонажей
-        characters_html = self._create_characters_section(characters)
-        
-        # Создаем HTML для панелей
-        panels_html = self._create_panels_section(panels, image_files)
-        
-        # Создаем полный HTML
-        html_content = self._create_full_html(
-            title=title,
-            characters_html=characters_html,
-            panels_html=panels_html
-        )
-        
-        # Сохраняем файл
-        filename = f"{output_name}.html"
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(html_content)
-            
-            logger.info(f"HTML файл создан: {filename}")
-            return filename
-            
-        except Exception as e:
-            logger.error(f"Ошибка создания HTML файла: {e}")
-            return ""
-    
-    def _create_characters_section(self, characters: List[ComicCharacter]) -> str:
-        """
-        Создание HTML секции с персонажами.
-        
-        Args:
-            characters: Список персонажей
-            
-        Returns:
-            HTML код секции персонажей
-        """
-        characters_html = ""
-        for char in characters:
-            characters_html += f"""
+# Шаблоны разметки разбираются один раз при импорте
+_CHARACTER_TPL = """
             <div class="character-card">
-                <h4>{char.name}</h4>
-                <p><strong>Роль:</strong> {char.role}</p>
-                <p><strong>Характер:</strong> {char.personality}</p>
+                <h4>{name}</h4>
+                <p><strong>Роль:</strong> {role}</p>
+                <p><strong>Характер:</strong> {personality}</p>
             </div>
             """
-        
-        return characters_html
-    
-    def _create_panels_section(self, 
-                              panels: List[ComicPanel], 
-                              image_files: List[str]) -> str:
-        """
-        Создание HTML секции с панелями.
-        
-        Args:
-            panels: Список панелей
-            image_files: Список файлов изображений
-            
-        Returns:
-            HTML код секции панелей
-        """
-        panels_html = ""
-        
-        for i, panel in enumerate(panels):
-            # Определяем источник изображения
-            img_src = self._get_image_source(i, image_files, panel.panel_id)
-            
-            # Создаем HTML для панели
-            panels_html += f"""
+
+# Панель пишется по частям: изображение потоково вставляется между ними
+_PANEL_HEAD_TPL = """
             <div class="comic-panel enhanced">
                 <div class="panel-header">
-                    <span class="panel-number">Панель {i+1}</span>
-                    <span class="panel-mood">{panel.mood}</span>
+                    <span class="panel-number">Панель %d</span>
+                    <span class="panel-mood">%s</span>
                 </div>
-                <img class="panel-image" src="{img_src}" alt="Панель {i+1}">
+                """
+
+_IMG_OPEN = '<img class="panel-image" src="'
+_IMG_CLOSE_TPL = '" alt="Панель %d">'
+
+# Повторяющееся встроенное изображение задается фоном из общего CSS правила
+_SHARED_IMG_TPL = '<div class="panel-image shared-image %s" role="img" aria-label="Панель %d"></div>'
+
+_PANEL_TAIL_BASE = """
                 <div class="panel-content">
-                    <div class="scene-description">{panel.scene_description}</div>
-                    {f'<div class="dialogue">💬 "{panel.dialogue}"</div>' if panel.dialogue else ''}
+                    <div class="scene-description">%s</div>
+                    {dialogue}
                     <div class="characters-present">
-                        👥 Персонажи: {', '.join(panel.characters)}
+                        👥 Персонажи: %s
                     </div>
                 </div>
             </div>
             """
-        
-        return panels_html
-    
-    def _get_image_source(self, 
-                         panel_index: int, 
-                         image_files: List[str], 
-                         panel_id: str) -> str:
-        """
-        Получение источника изображения для панели.
-        
-        Args:
-            panel_index: Индекс панели
-            image_files: Список файлов изображений
-            panel_id: ID панели
-            
-        Returns:
-            Источник изображения (base64 или placeholder)
-        """
-        # Если есть файл изображения
-        if panel_index < len(image_files) and os.path.exists(image_files[panel_index]):
-            try:
-                with open(image_files[panel_index], "rb") as f:
-                    img_data = base64.b64encode(f.read()).decode()
-                return f"data:image/png;base64,{img_data}"
-            except Exception as e:
-                logger.warning(f"Ошибка загрузки изображения {image_files[panel_index]}: {e}")
-        
-        # Возвращаем placeholder
-        return f"https://via.placeholder.com/600x400/4CAF50/white?text=Панель+{panel_index+1}"
-    
-    def _create_full_html(self, 
-                         title: str, 
-                         characters_html: str, 
-                         panels_html: str) -> str:
-        """
-        Создание полного HTML документа.
-        
-        Args:
-            title: Заголовок страницы
-            characters_html: HTML секции персонажей
-            panels_html: HTML секции панелей
-            
-        Returns:
-            Полный HTML код
-        """
-        return f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{title}</title>
-    <style>
-        {self._get_css_styles()}
-    </style>
-</head>
-<body>
-    <div class="comic-container">
-        <div class="header">
-            <h1>📚 {title}</h1>
-            <p>Увлекательная история о важных процедурах</p>
-        </div>
-        
-        <div class="characters-section">
-            <h2 style="color: #333; margin-bottom: 10px;">👥 Персонажи истории</h2>
-            <div class="characters-grid">
-                {characters_html}
-            </div>
-        </div>
-        
-        <div class="comic-grid">
-            {panels_html}
-        </div>
-        
-        <div class="footer">
-            <p>🎨 Создано с помощью генератора комиксов</p>
-            <p>Качественные изображения • Продуманный сценарий • Образовательный контент</p>
-        </div>
-    </div>
-</body>
-</html>"""
-    
-    def _get_css_styles(self) -> str:
-        """
-        Получение CSS стилей для HTML.
-        
-        Returns:
-            CSS код
-        """
-        return """
+
+# Два варианта конца панели, выбираемые по наличию диалога: [без диалога, с диалогом].
+# Оба принимают одинаковый кортеж; %.0s поглощает пустой диалог без вывода
+_PANEL_TAIL_TEMPLATES = (
+    _PANEL_TAIL_BASE.replace("{dialogue}", "%.0s"),
+    _PANEL_TAIL_BASE.replace("{dialogue}", '<div class="dialogue">💬 "%s"</div>'),
+)
+
+_CSS_SOURCE = """
         * { margin: 0; padding: 0; box-sizing: border-box; }
         body { 
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
@@ -302,6 +148,12 @@ class HTMLGenerator:
             object-fit: cover;
             display: block;
         }
+        .panel-image.shared-image {
+            background-size: cover;
+            background-position: center;
+            -webkit-print-color-adjust: exact;
+            print-color-adjust: exact;
+        }
         .panel-content {
             padding: 20px;
         }
@@ -349,4 +201,522 @@ class HTMLGenerator:
                 height: 250px;
             }
         }
-        """
\ No newline at end of file
+        """
+
+
+def _minify_css(css: str) -> str:
+    """
+    Сжатие CSS: удаление комментариев и лишних пробелов.
+    
+    Args:
+        css: Исходный CSS код
+        
+    Returns:
+        Сжатый CSS код
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+# Стили сжимаются один раз при импорте и переиспользуются для всех документов
+_CSS = _minify_css(_CSS_SOURCE)
+
+
+# Фрагменты страницы записываются в файл по очереди, без сборки всего документа
+_PAGE_HEAD_SOURCE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+    <style>
+        {css}
+    </style>
+"""
+
+# Между _PAGE_HEAD_SOURCE и _PAGE_BODY_SOURCE пишутся стили общих изображений
+_PAGE_BODY_SOURCE = """</head>
+<body>
+    <div class="comic-container">
+        <div class="header">
+            <h1>📚 {title}</h1>
+            <p>Увлекательная история о важных процедурах</p>
+        </div>
+        
+"""
+
+# Стили подставляются один раз; заголовок вставляется в разрывы через str.join
+_PAGE_HEAD_PARTS = _PAGE_HEAD_SOURCE.replace("{css}", _CSS).split("{title}")
+_PAGE_BODY_PARTS = _PAGE_BODY_SOURCE.split("{title}")
+
+_CHARACTERS_OPEN = """        <div class="characters-section">
+            <h2 style="color: #333; margin-bottom: 10px;">👥 Персонажи истории</h2>
+            <div class="characters-grid">
+                """
+
+_CHARACTERS_CLOSE = """
+            </div>
+        </div>
+        
+"""
+
+_PANELS_OPEN = """        <div class="comic-grid">
+            """
+
+_PANELS_CLOSE = """
+        </div>
+        
+"""
+
+_PAGE_FOOTER = """        <div class="footer">
+            <p>🎨 Создано с помощью генератора комиксов</p>
+            <p>Качественные изображения • Продуманный сценарий • Образовательный контент</p>
+        </div>
+    </div>
+</body>
+</html>"""
+
+
+def _escape_text(value: Any) -> str:
+    """
+    Экранирование текста модели для вставки в HTML.
+    
+    Args:
+        value: Значение поля модели
+        
+    Returns:
+        Экранированная строка
+    """
+    # str() не применяется к строкам: у строковых Enum он вернул бы имя члена
+    if not isinstance(value, str):
+        value = str(value)
+    return html.escape(value, quote=False)
+
+
+@lru_cache(maxsize=1024)
+def _render_character_card(name: str, role: str, personality: str) -> str:
+    """
+    Создание HTML карточки персонажа с кэшированием.
+    
+    Персонажи часто повторяются между комиксами одной серии.
+    
+    Args:
+        name: Имя персонажа
+        role: Роль персонажа
+        personality: Характер персонажа
+        
+    Returns:
+        HTML код карточки
+    """
+    return _CHARACTER_TPL.format(
+        name=_escape_text(name),
+        role=_escape_text(role),
+        personality=_escape_text(personality)
+    )
+
+
+def _placeholder_url(panel_index: int) -> str:
+    """
+    Получение адреса изображения-заглушки для панели.
+    
+    Args:
+        panel_index: Индекс панели
+        
+    Returns:
+        URL заглушки
+    """
+    return f"https://via.placeholder.com/600x400/4CAF50/white?text=Панель+{panel_index+1}"
+
+
+# Размер блока чтения изображения при потоковом кодировании
+_B64_CHUNK = 57 * 1024
+
+# Размер буфера записи HTML файла
+_WRITE_BUFFER = 1024 * 1024
+
+
+def _write_data_uri(f: TextIO, image: BinaryIO) -> None:
+    """
+    Потоковая запись изображения в файл как data URI.
+    
+    Изображение читается и кодируется блоками, поэтому в памяти
+    одновременно находится только один блок.
+    
+    Args:
+        f: Открытый HTML файл для записи
+        image: Открытый на чтение файл изображения
+    """
+    # base64 нужен только при встраивании изображений
+    import base64
+    
+    write = f.write
+    write("data:image/png;base64,")
+    # Блоки кратны 3 байтам, поэтому base64 кодируется без хвостов между ними
+    for chunk in iter(lambda: image.read(_B64_CHUNK), b""):
+        write(base64.b64encode(chunk).decode("ascii"))
+
+
+@lru_cache(maxsize=256)
+def _image_digest(path: str, mtime_ns: int, size: int) -> str:
+    """
+    Хэш содержимого изображения с кэшированием.
+    
+    Args:
+        path: Путь к файлу изображения
+        mtime_ns: Время изменения файла (часть ключа кэша)
+        size: Размер файла (часть ключа кэша)
+        
+    Returns:
+        Шестнадцатеричный blake2b хэш содержимого
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_B64_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HTMLGenerator:
+    """Генератор HTML страниц для комиксов."""
+    
+    def __init__(self):
+        """Инициализация генератора HTML."""
+        pass
+    
+    def create_comic_html(self, 
+                         panels: List[ComicPanel], 
+                         characters: List[ComicCharacter],
+                         image_files: List[str], 
+                         output_name: str,
+                         title: str = "Образовательный комикс",
+                         inline_images: bool = False) -> str:
+        """
+        Создание HTML страницы комикса.
+        
+        Args:
+            panels: Список панелей комикса
+            characters: Список персонажей
+            image_files: Список путей к файлам изображений
+            output_name: Базовое имя для выходного файла
+            title: Заголовок комикса
+            inline_images: Встраивать изображения в HTML как base64
+                (автономный файл) вместо ссылок на файлы
+            
+        Returns:
+            Путь к созданному HTML файлу
+        """
+        logger.info(f"Создание HTML для комикса: {title}")
+        
+        # Без встраивания ссылки на изображения строятся
+        # относительно каталога HTML файла
+        filename = f"{output_name}.html"
+        link_dir = None if inline_images else os.path.dirname(os.path.abspath(filename))
+        
+        # Записываем страницу по частям, не держа весь документ в памяти
+        try:
+            # Все файлы проверяются одним проходом до рендеринга панелей
+            file_stats = self._stat_files(image_files)
+            shared: Dict[str, str] = {}
+            if link_dir is None:
+                # Одинаковые изображения встраиваются один раз, стилями в <head>
+                shared = self._find_shared_images(image_files[:len(panels)], file_stats)
+            
+            # Крупный буфер объединяет мелкие фрагменты в редкие системные вызовы
+            with open(filename, "w", encoding="utf-8", buffering=_WRITE_BUFFER) as f:
+                self._write_header(f, title, shared)
+                self._write_characters(f, characters)
+                self._write_panels(f, panels, image_files, file_stats, shared, link_dir)
+                self._write_footer(f)
+            
+            logger.info(f"HTML файл создан: {filename}")
+            return filename
+            
+        except Exception as e:
+            logger.error(f"Ошибка создания HTML файла: {e}")
+            return ""
+    
+    @classmethod
+    def create_comic_html_batch(cls, 
+                                jobs: List[Dict[str, Any]], 
+                                workers: Optional[int] = None) -> List[str]:
+        """
+        Создание HTML для нескольких комиксов параллельно в отдельных процессах.
+        
+        Комиксы независимы, а сборка строк и base64 держат GIL, поэтому
+        используются процессы, а не потоки.
+        
+        Args:
+            jobs: Список аргументов create_comic_html для каждого комикса
+            workers: Количество процессов (по умолчанию по числу ядер)
+            
+        Returns:
+            Пути к созданным HTML файлам в порядке jobs ("" при ошибке)
+        """
+        if len(jobs) < 2:
+            return [cls._render_job(job) for job in jobs]
+        
+        # Импорт здесь: модуль процессов тянет multiprocessing, а пакетный
+        # режим нужен редко
+        from concurrent.futures import ProcessPoolExecutor
+        
+        with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as executor:
+            return list(executor.map(cls._render_job, jobs))
+    
+    @classmethod
+    def _render_job(cls, job: Dict[str, Any]) -> str:
+        """
+        Создание HTML одного комикса из словаря аргументов.
+        
+        Args:
+            job: Аргументы create_comic_html
+            
+        Returns:
+            Путь к созданному HTML файлу
+        """
+        return cls().create_comic_html(**job)
+    
+    def _write_header(self, f: TextIO, title: str, shared: Dict[str, str]) -> None:
+        """
+        Запись начала HTML документа со стилями и заголовком.
+        
+        Args:
+            f: Открытый файл для записи
+            title: Заголовок страницы
+            shared: Словарь путь -> id общего изображения
+        """
+        f.write(title.join(_PAGE_HEAD_PARTS))
+        if shared:
+            self._write_shared_images(f, shared)
+        f.write(title.join(_PAGE_BODY_PARTS))
+    
+    def _write_characters(self, f: TextIO, characters: List[ComicCharacter]) -> None:
+        """
+        Запись секции с персонажами.
+        
+        Args:
+            f: Открытый файл для записи
+            characters: Список персонажей
+        """
+        write = f.write
+        write(_CHARACTERS_OPEN)
+        for char in characters:
+            write(_render_character_card(char.name, char.role, char.personality))
+        write(_CHARACTERS_CLOSE)
+    
+    def _write_panels(self, 
+                      f: TextIO, 
+                      panels: List[ComicPanel], 
+                      image_files: List[str],
+                      file_stats: Dict[str, os.stat_result],
+                      shared: Dict[str, str],
+                      link_dir: Optional[str] = None) -> None:
+        """
+        Запись секции с панелями, по одной панели за раз.
+        
+        Args:
+            f: Открытый файл для записи
+            panels: Список панелей
+            image_files: Список файлов изображений
+            file_stats: Результаты os.stat по путям изображений
+            shared: Словарь путь -> id общего изображения (стили уже в <head>)
+            link_dir: Каталог для относительных ссылок (None - встраивать base64)
+        """
+        write = f.write
+        write(_PANELS_OPEN)
+        for i, panel in enumerate(panels):
+            shared_id = shared.get(image_files[i]) if i < len(image_files) else None
+            self._write_panel(f, i, panel, image_files, link_dir, file_stats, shared_id)
+        write(_PANELS_CLOSE)
+    
+    @staticmethod
+    def _write_shared_images(f: TextIO, shared: Dict[str, str]) -> None:
+        """
+        Запись повторяющихся изображений один раз в виде CSS правил.
+        
+        Панели ссылаются на правило по классу, поэтому изображение
+        отображается без JavaScript (печать, почтовые клиенты).
+        
+        Args:
+            f: Открытый файл для записи
+            shared: Словарь путь -> id общего изображения
+        """
+        write = f.write
+        write("    <style>\n")
+        written: Set[str] = set()
+        for path, image_id in shared.items():
+            if image_id in written:
+                continue
+            written.add(image_id)
+            write(f'.{image_id}{{background-image:url("')
+            try:
+                with open(path, "rb") as image:
+                    _write_data_uri(f, image)
+            except OSError as e:
+                logger.warning(f"Ошибка загрузки изображения {path}: {e}")
+            write('")}\n')
+        write("    </style>\n")
+    
+    @staticmethod
+    def _find_shared_images(paths: List[str], 
+                            file_stats: Dict[str, os.stat_result]) -> Dict[str, str]:
+        """
+        Поиск изображений, содержимое которых повторяется в нескольких панелях.
+        
+        Хэш считается только для файлов с совпадающим размером.
+        
+        Args:
+            paths: Пути к изображениям панелей по порядку
+            file_stats: Результаты os.stat по путям изображений
+            
+        Returns:
+            Словарь путь -> id общего изображения (только для повторов)
+        """
+        by_size: Dict[int, List[str]] = {}
+        for path in paths:
+            st = file_stats.get(path)
+            if st is not None:
+                by_size.setdefault(st.st_size, []).append(path)
+        
+        digests: Dict[str, str] = {}
+        counts: Dict[str, int] = {}
+        for group in by_size.values():
+            if len(group) < 2:
+                continue
+            for path in group:
+                if path not in digests:
+                    st = file_stats[path]
+                    try:
+                        digests[path] = _image_digest(path, st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        continue
+                counts[digests[path]] = counts.get(digests[path], 0) + 1
+        
+        return {
+            path: f"img-{digest}"
+            for path, digest in digests.items() if counts[digest] > 1
+        }
+    
+    @staticmethod
+    def _stat_files(paths: List[str]) -> Dict[str, os.stat_result]:
+        """
+        Получение метаданных существующих файлов изображений.
+        
+        Args:
+            paths: Список путей к файлам
+            
+        Returns:
+            Словарь путь -> os.stat_result (отсутствующие файлы пропускаются)
+        """
+        file_stats: Dict[str, os.stat_result] = {}
+        for path in paths:
+            if path in file_stats:
+                continue
+            try:
+                file_stats[path] = os.stat(path)
+            except OSError:
+                pass
+        return file_stats
+    
+    def _write_footer(self, f: TextIO) -> None:
+        """
+        Запись подвала и закрывающих тегов документа.
+        
+        Args:
+            f: Открытый файл для записи
+        """
+        f.write(_PAGE_FOOTER)
+    
+    def _write_panel(self, 
+                     f: TextIO, 
+                     i: int, 
+                     panel: ComicPanel, 
+                     image_files: List[str],
+                     link_dir: Optional[str] = None,
+                     file_stats: Optional[Dict[str, os.stat_result]] = None,
+                     shared_id: Optional[str] = None) -> None:
+        """
+        Запись HTML одной панели.
+        
+        Args:
+            f: Открытый файл для записи
+            i: Индекс панели
+            panel: Панель комикса
+            image_files: Список файлов изображений
+            link_dir: Каталог для относительных ссылок (None - встраивать base64)
+            file_stats: Результаты os.stat по путям изображений
+            shared_id: Класс общего изображения из CSS (для повторов)
+        """
+        write = f.write
+        number = i + 1
+        
+        # Текст модели экранируется при подстановке: модели не хранят HTML
+        write(_PANEL_HEAD_TPL % (number, _escape_text(panel.mood)))
+        
+        # Источник изображения пишется прямо в файл
+        if shared_id is not None:
+            write(_SHARED_IMG_TPL % (shared_id, number))
+        else:
+            write(_IMG_OPEN)
+            self._write_image_source(f, i, image_files, panel.panel_id, link_dir, file_stats)
+            write(_IMG_CLOSE_TPL % number)
+        
+        write(_PANEL_TAIL_TEMPLATES[bool(panel.dialogue)] % (
+            _escape_text(panel.scene_description),
+            _escape_text(panel.dialogue),
+            _escape_text(', '.join(panel.characters))
+        ))
+    
+    def _write_image_source(self, 
+                            f: TextIO,
+                            panel_index: int, 
+                            image_files: List[str], 
+                            panel_id: str,
+                            link_dir: Optional[str] = None,
+                            file_stats: Optional[Dict[str, os.stat_result]] = None) -> None:
+        """
+        Запись источника изображения для панели.
+        
+        Args:
+            f: Открытый файл для записи
+            panel_index: Индекс панели
+            image_files: Список файлов изображений
+            panel_id: ID панели
+            link_dir: Каталог для относительных ссылок (None - встраивать base64)
+            file_stats: Результаты os.stat по путям изображений
+        """
+        try:
+            path = image_files[panel_index]
+            if file_stats is None:
+                file_stats = self._stat_files([path])
+            if path not in file_stats:
+                raise FileNotFoundError(path)
+            
+            if link_dir is not None:
+                # Ссылка на файл без чтения и кодирования изображения
+                rel_path = os.path.relpath(os.path.abspath(path), link_dir)
+                f.write(quote(rel_path.replace(os.sep, "/")))
+                return
+            
+            image = open(path, "rb")
+        except (IndexError, FileNotFoundError):
+            # Нет файла для панели - используем placeholder
+            f.write(_placeholder_url(panel_index))
+            return
+        except Exception as e:
+            logger.warning(f"Ошибка загрузки изображения {image_files[panel_index]}: {e}")
+            f.write(_placeholder_url(panel_index))
+            return
+        
+        with image:
+            _write_data_uri(f, image)
+    
+    @staticmethod
+    def _get_css_styles() -> str:
+        """
+        Получение CSS стилей для HTML.
+        
+        Returns:
+            CSS код
+        """
+        return _CSS
\ No newline at end of file
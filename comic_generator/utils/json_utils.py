@@ -0,0 +1,107 @@
+"""
+Сериализация JSON с необязательным ускорением через msgspec или orjson.
+"""
+
+import json
+from typing import Any, Callable, Mapping, Optional, Union
+
+try:
+    import msgspec
+except ImportError:  # необязательная зависимость, без нее используется orjson или json
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость, без нее используется стандартный json
+    orjson = None
+
+# Заголовки для тела запроса, переданного готовыми байтами
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Разбор JSON из строки или байтов.
+    
+    Args:
+        data: JSON документ
+        
+    Returns:
+        Распарсенный объект
+    """
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Компактная сериализация объекта в байты UTF-8.
+    
+    Используется для тел HTTP запросов и файлов, которые читает
+    только программа. Dataclass-модели кодируются напрямую.
+    
+    Args:
+        obj: Сериализуемый объект
+        
+    Returns:
+        JSON документ в байтах
+    """
+    if msgspec is not None:
+        return msgspec.json.encode(obj)
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_to_plain).encode("utf-8")
+
+
+def dumps_pretty(obj: Any) -> bytes:
+    """
+    Сериализация объекта с отступами для файлов, которые читает человек.
+    
+    Dataclass-модели msgspec и orjson кодируют напрямую по полям,
+    без промежуточных словарей из to_dict.
+    
+    Args:
+        obj: Сериализуемый объект
+        
+    Returns:
+        JSON документ в байтах UTF-8
+    """
+    if msgspec is not None:
+        return msgspec.json.format(msgspec.json.encode(obj), indent=2)
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2, default=_to_plain).encode("utf-8")
+
+
+def make_decoder(type_: Any) -> Optional[Callable[[Union[str, bytes]], Any]]:
+    """
+    Декодер JSON сразу в экземпляры заданного типа.
+    
+    msgspec разбирает документ по схеме dataclass-моделей на C, без
+    промежуточных словарей и from_dict.
+    
+    Args:
+        type_: Тип результата, например dataclass-модель
+        
+    Returns:
+        Функция декодирования или None, если msgspec недоступен
+    """
+    if msgspec is None:
+        return None
+    try:
+        return msgspec.json.Decoder(type_).decode
+    except TypeError:
+        # Тип не поддерживается msgspec: остается разбор через словари
+        return None
+
+
+def _to_plain(obj: Any) -> Any:
+    """Преобразование моделей и отображений для стандартного json."""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
\ No newline at end of file
@@ -2,7 +2,7 @@
 Установочный скрипт для генератора комиксов.
 """
 
-from setuptools import setup, find_packages
+from setuptools import setup
 
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
@@ -19,7 +19,14 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/user/comic-generator",
-    packages=find_packages(),
+    packages=[
+        "comic_generator",
+        "comic_generator.config",
+        "comic_generator.generators",
+        "comic_generator.models",
+        "comic_generator.services",
+        "comic_generator.utils",
+    ],
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Education",
@@ -50,6 +57,9 @@ setup(
             "uvicorn>=0.23.0",
             "jinja2>=3.1.0",
         ],
+        "fast-json": [
+            "msgspec>=0.18.0",
+        ],
     },
     entry_points={
         "console_scripts": [
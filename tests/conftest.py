@@ -0,0 +1,45 @@
+"""
+Общие настройки тестов.
+
+Парсеры ответов LLM не обращаются к агентам, поэтому без установленных
+crewai и litellm их модули подменяются заглушками.
+"""
+
+import os
+import sys
+import types
+
+# Пакет запускается из корня репозитория без установки
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _Stub:
+    """Заглушка классов crewai: принимает любые аргументы."""
+    
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+
+def _install_stub(name: str, **attrs) -> None:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+
+
+try:
+    import crewai  # noqa: F401
+except ImportError:
+    _install_stub(
+        "crewai",
+        Agent=_Stub,
+        Task=_Stub,
+        Crew=_Stub,
+        Process=types.SimpleNamespace(sequential="sequential")
+    )
+    _install_stub("crewai.llm", LLM=_Stub)
+
+try:
+    import litellm  # noqa: F401
+except ImportError:
+    _install_stub("litellm", completion=None)
\ No newline at end of file
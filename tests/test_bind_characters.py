@@ -0,0 +1,102 @@
+"""
+Тесты подстановки имен персонажей вместо меток ролей.
+"""
+
+import pytest
+
+from comic_generator.generators.scenario_generator import ScenarioGenerator
+from comic_generator.models.comic_models import ComicCharacter, ComicPanel, MoodType
+
+
+@pytest.fixture
+def generator():
+    """Генератор без агентов: подстановка не обращается к LLM."""
+    return ScenarioGenerator.__new__(ScenarioGenerator)
+
+
+def make_character(name: str) -> ComicCharacter:
+    return ComicCharacter(
+        name=name,
+        description="описание",
+        personality="характер",
+        role="роль",
+        visual_style="стиль"
+    )
+
+
+def make_panel(scene: str, dialogue: str, characters) -> ComicPanel:
+    return ComicPanel(
+        panel_id="panel_1",
+        scene_description=scene,
+        dialogue=dialogue,
+        visual_prompt="",
+        characters=list(characters),
+        mood=MoodType.NEUTRAL.value,
+        importance=0.5
+    )
+
+
+def test_bind_characters_replaces_placeholders(generator):
+    """Метки ролей заменяются именами в описании, диалоге и списке участников."""
+    panel = make_panel(
+        "[ГЕРОЙ] приходит к [НАСТАВНИК]",
+        "[НАСТАВНИК]: Здравствуйте, [ГЕРОЙ]!",
+        ["[ГЕРОЙ]", "НАСТАВНИК", "Охранник"]
+    )
+    characters = [make_character("Анна"), make_character("Борис"), make_character("Вера")]
+    
+    panels = generator.bind_characters([panel], characters)
+    
+    assert panels == [panel]
+    assert panel.scene_description == "Анна приходит к Борис"
+    assert panel.dialogue == "Борис: Здравствуйте, Анна!"
+    assert panel.characters == ["Анна", "Борис", "Охранник"]
+
+
+def test_bind_characters_reuses_last_name(generator):
+    """Ролям без персонажа достается имя последнего персонажа."""
+    panel = make_panel("[ПЕРСОНАЖ] ждет", "[НАСТАВНИК]: Проходите", ["[ПЕРСОНАЖ]"])
+    
+    generator.bind_characters([panel], [make_character("Анна"), make_character("Борис")])
+    
+    assert panel.scene_description == "Борис ждет"
+    assert panel.dialogue == "Борис: Проходите"
+    assert panel.characters == ["Борис"]
+
+
+def test_bind_characters_without_characters(generator):
+    """Без персонажей используются персонажи по умолчанию."""
+    default_names = [char.name for char in generator._get_default_characters()]
+    panel = make_panel("[ГЕРОЙ] и [НАСТАВНИК]", "", ["ГЕРОЙ"])
+    
+    generator.bind_characters([panel], [])
+    
+    assert panel.scene_description == f"{default_names[0]} и {default_names[1]}"
+    assert panel.characters == [default_names[0]]
+
+
+def test_bind_characters_after_null_fields(generator):
+    """Панели с null в ответе LLM проходят подстановку без ошибок."""
+    panels = generator.parse_panels(
+        '[{"panel_id": null, "scene_description": "[ГЕРОЙ] у окна",'
+        ' "dialogue": null, "characters": ["[ГЕРОЙ]", null, 5], "mood": null}]'
+    )
+    
+    generator.bind_characters(panels, [make_character("Анна")])
+    
+    panel = panels[0]
+    assert panel.panel_id == "panel_1"
+    assert panel.scene_description == "Анна у окна"
+    assert panel.dialogue == ""
+    assert panel.characters == ["Анна"]
+    assert panel.mood == MoodType.NEUTRAL.value
+
+
+def test_bind_characters_with_null_characters(generator):
+    """null вместо списка участников дает пустой список."""
+    panels = generator.parse_panels('[{"dialogue": "[ГЕРОЙ]: Привет", "characters": null}]')
+    
+    generator.bind_characters(panels, [make_character("Анна")])
+    
+    assert panels[0].dialogue == "Анна: Привет"
+    assert panels[0].characters == []
\ No newline at end of file
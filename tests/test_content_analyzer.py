@@ -0,0 +1,70 @@
+"""
+Тесты разбора ответа анализатора документа.
+"""
+
+import pytest
+
+from comic_generator.generators.content_analyzer import ContentAnalyzer
+from comic_generator.models.comic_models import ProcessParticipant, ProcessStep
+
+
+@pytest.fixture
+def analyzer():
+    """Анализатор без агента: разбор ответа не обращается к LLM."""
+    return ContentAnalyzer.__new__(ContentAnalyzer)
+
+
+@pytest.mark.parametrize("response", [
+    "",
+    "Процесс не найден",
+    '{"process_name": "Получение',
+    "[]",
+])
+def test_parse_process_info_malformed(analyzer, response):
+    """Ответ без JSON объекта дает None, а не исключение."""
+    assert analyzer.parse_process_info(response) is None
+
+
+def test_parse_process_info_from_surrounding_text(analyzer):
+    """Объект извлекается из ответа с текстом до и после него."""
+    response = (
+        'Результат анализа:\n'
+        '{"process_name": "Получение справки",'
+        ' "participants": [{"role": "Заявитель", "description": "Подает заявление"}],'
+        ' "steps": [{"step_number": 1, "action": "Подать", "description": "Форма",'
+        ' "responsible": "Заявитель"}],'
+        ' "rules": ["Паспорт"], "outcome": "Справка"}\n'
+        'Готово {если нужно, уточню}.'
+    )
+    
+    process_info = analyzer.parse_process_info(response)
+    
+    assert process_info.process_name == "Получение справки"
+    assert process_info.participants == [ProcessParticipant("Заявитель", "Подает заявление")]
+    assert process_info.steps == [ProcessStep(1, "Подать", "Форма", "Заявитель")]
+    assert process_info.rules == ["Паспорт"]
+    assert process_info.outcome == "Справка"
+
+
+def test_parse_process_info_skips_non_objects(analyzer):
+    """Участники и этапы строками вместо объектов пропускаются."""
+    response = (
+        '{"process_name": "Получение справки",'
+        ' "participants": ["Гражданин", "Специалист", {"role": "Заявитель"}],'
+        ' "steps": ["Подать заявление", null]}'
+    )
+    
+    process_info = analyzer.parse_process_info(response)
+    
+    assert process_info.participants == [ProcessParticipant("Заявитель", "")]
+    assert process_info.steps == []
+
+
+def test_parse_process_info_null_lists(analyzer):
+    """null вместо списков участников и этапов дает пустые списки."""
+    process_info = analyzer.parse_process_info(
+        '{"process_name": "Получение справки", "participants": null, "steps": null}'
+    )
+    
+    assert process_info.participants == []
+    assert process_info.steps == []
\ No newline at end of file
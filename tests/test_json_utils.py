@@ -0,0 +1,111 @@
+"""
+Тесты сохранения и загрузки данных комикса на каждом JSON бэкенде.
+"""
+
+import pytest
+
+from comic_generator.models.comic_models import (
+    ComicCharacter, ComicData, ComicPanel, MoodType,
+    ProcessInfo, ProcessParticipant, ProcessStep
+)
+from comic_generator.utils import data_manager, json_utils
+from comic_generator.utils.data_manager import DataManager
+
+
+@pytest.fixture(params=["msgspec", "orjson", "json"])
+def backend(request, monkeypatch):
+    """Принудительный выбор бэкенда: более быстрые отключаются."""
+    if request.param == "msgspec":
+        pytest.importorskip("msgspec")
+    else:
+        monkeypatch.setattr(json_utils, "msgspec", None)
+        monkeypatch.setattr(data_manager, "_COMIC_DECODER", None)
+    
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    elif request.param == "json":
+        monkeypatch.setattr(json_utils, "orjson", None)
+    
+    return request.param
+
+
+@pytest.fixture
+def comic_data():
+    return ComicData(
+        process_info=ProcessInfo(
+            process_name="Получение справки",
+            participants=[ProcessParticipant(role="Заявитель", description="Подает заявление")],
+            steps=[ProcessStep(
+                step_number=1,
+                action="Подать заявление",
+                description="Заполнить форму",
+                responsible="Заявитель"
+            )],
+            rules=["Паспорт обязателен"],
+            outcome="Справка выдана"
+        ),
+        characters=[ComicCharacter(
+            name="Анна",
+            description="Студентка \"в очках\"",
+            personality="Любопытная",
+            role="Главный герой",
+            visual_style="реализм"
+        )],
+        panels=[ComicPanel(
+            panel_id="panel_1",
+            scene_description="Анна в очереди",
+            dialogue="Анна: Здравствуйте!\nМне нужна справка.",
+            visual_prompt="office, queue",
+            characters=["Анна"],
+            mood=MoodType.FRIENDLY.value,
+            importance=0.75
+        )],
+        metadata={"target_audience": "взрослые", "num_panels": 1}
+    )
+
+
+def test_dumps_loads_round_trip(backend):
+    """dumps выдает UTF-8 байты, которые loads разбирает обратно."""
+    data = {"текст": "Привет, мир", "числа": [1, 2.5], "флаг": True, "пусто": None}
+    
+    encoded = json_utils.dumps(data)
+    
+    assert isinstance(encoded, bytes)
+    assert json_utils.loads(encoded) == data
+    assert json_utils.loads(encoded.decode("utf-8")) == data
+    assert json_utils.loads(json_utils.dumps_pretty(data)) == data
+
+
+def test_dumps_models(backend, comic_data):
+    """Модели сериализуются так же, как их to_dict."""
+    assert json_utils.loads(json_utils.dumps(comic_data)) == comic_data.to_dict()
+    assert json_utils.loads(json_utils.dumps_pretty(comic_data)) == comic_data.to_dict()
+
+
+def test_save_load_round_trip(backend, comic_data, tmp_path):
+    """Сохраненный комикс загружается без потерь."""
+    manager = DataManager(output_dir=str(tmp_path))
+    
+    filename = manager.save_comic_data(comic_data, "comic")
+    loaded = manager.load_comic_data(filename)
+    
+    assert filename
+    assert loaded == comic_data
+    assert loaded.metadata["saved_at"] == comic_data.metadata["saved_at"]
+    assert loaded.metadata["version"] == "1.0"
+
+
+def test_load_missing_file(backend, tmp_path):
+    """Отсутствующий файл дает None."""
+    manager = DataManager(output_dir=str(tmp_path))
+    
+    assert manager.load_comic_data(str(tmp_path / "missing_data.json")) is None
+
+
+def test_load_corrupted_file(backend, tmp_path):
+    """Битый файл дает None, а не исключение."""
+    path = tmp_path / "broken_data.json"
+    path.write_bytes(b'{"process_info": {"process_name": "')
+    manager = DataManager(output_dir=str(tmp_path))
+    
+    assert manager.load_comic_data(str(path)) is None
\ No newline at end of file
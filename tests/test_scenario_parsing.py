@@ -0,0 +1,114 @@
+"""
+Тесты разбора ответов LLM со сценарием.
+"""
+
+import pytest
+
+from comic_generator.generators.scenario_generator import ScenarioGenerator
+from comic_generator.models.comic_models import ComicCharacter, MoodType
+
+
+@pytest.fixture
+def generator():
+    """Генератор без агентов: парсеры не обращаются к LLM."""
+    return ScenarioGenerator.__new__(ScenarioGenerator)
+
+
+@pytest.mark.parametrize("response", [
+    "",
+    "   ",
+    "Не удалось создать персонажей.",
+    "[",
+    '[{"name": "Анна", "role": "герой"',
+    '{"name": "Анна"}',
+    "[1, 2",
+])
+def test_parse_characters_malformed(generator, response):
+    """Пустой или битый ответ дает пустой список, а не исключение."""
+    assert generator.parse_characters(response) == []
+
+
+@pytest.mark.parametrize("response", [
+    "",
+    "Сценарий не готов",
+    '[{"panel_id": "panel_1", "dialogue": "Привет"}, {"panel_id": ',
+    "]",
+])
+def test_parse_panels_malformed(generator, response):
+    """Пустой или битый ответ дает пустой список, а не исключение."""
+    assert generator.parse_panels(response) == []
+
+
+def test_parse_characters_from_surrounding_text(generator):
+    """Массив извлекается из ответа с текстом до и после него."""
+    response = (
+        'Вот персонажи:\n'
+        '[{"name": "Анна", "description": "студентка", "personality": "любопытная",'
+        ' "role": "герой", "visual_style": "реализм"}]\n'
+        'Надеюсь, подойдет [если нет, напишите].'
+    )
+    
+    characters = generator.parse_characters(response)
+    
+    assert characters == [ComicCharacter(
+        name="Анна",
+        description="студентка",
+        personality="любопытная",
+        role="герой",
+        visual_style="реализм"
+    )]
+
+
+def test_parse_characters_missing_fields(generator):
+    """Отсутствующие поля персонажа заполняются пустыми строками."""
+    characters = generator.parse_characters('[{"name": "Анна"}]')
+    
+    assert characters == [ComicCharacter("Анна", "", "", "", "")]
+
+
+def test_parse_panels_defaults(generator):
+    """Отсутствующие поля панели получают значения по умолчанию."""
+    panels = generator.parse_panels('[{"dialogue": "Привет"}, {"panel_id": "p2", "importance": 0.9}]')
+    
+    assert [panel.panel_id for panel in panels] == ["panel_1", "p2"]
+    assert panels[0].dialogue == "Привет"
+    assert panels[0].scene_description == ""
+    assert panels[0].characters == []
+    assert panels[0].mood == MoodType.NEUTRAL.value
+    assert panels[0].importance == 0.5
+    assert panels[1].importance == 0.9
+    assert all(panel.visual_prompt == "" for panel in panels)
+
+
+def test_parse_characters_skips_non_objects(generator):
+    """Элементы массива, не являющиеся объектами, пропускаются."""
+    response = '["Анна", 42, null, {"name": "Борис"}]'
+    
+    characters = generator.parse_characters(response)
+    
+    assert [char.name for char in characters] == ["Борис"]
+
+
+def test_parse_panels_skips_non_objects(generator):
+    """Панели строками вместо объектов пропускаются."""
+    panels = generator.parse_panels('["Анна приходит", {"panel_id": "p1"}]')
+    
+    assert [panel.panel_id for panel in panels] == ["p1"]
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('"0.8"', 0.8),
+    ("1", 1.0),
+    ("1.5", 1.0),
+    ("-0.2", 0.0),
+    ('"высокая"', 0.5),
+    ("null", 0.5),
+    ("[0.8]", 0.5),
+    ('"nan"', 0.5),
+])
+def test_parse_panels_coerces_importance(generator, raw, expected):
+    """Важность приводится к числу от 0 до 1, иначе берется 0.5."""
+    panels = generator.parse_panels('[{"panel_id": "p1", "importance": %s}]' % raw)
+    
+    assert panels[0].importance == expected
+    assert isinstance(panels[0].importance, float)
\ No newline at end of file